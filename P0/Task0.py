@@ -1,15 +1,9 @@
 """
-Read file into texts and calls.
-It's ok if you don't understand how to read files.
+Read the first record of texts and the last record of calls.
+Neither file is loaded: the first record is read from the start of texts and
+the last record is found by seeking backwards from the end of calls.
 """
-import csv
-with open('texts.csv', 'r') as f:
-    reader = csv.reader(f)
-    texts = list(reader)
-
-with open('calls.csv', 'r') as f:
-    reader = csv.reader(f)
-    calls = list(reader)
+from records import CALLS_PATH, TEXTS_PATH, first_record, last_record
 
 
 """
@@ -19,19 +13,18 @@ Print messages:
 "First record of texts, <incoming number> texts <answering number> at time <time>"
 "Last record of calls, <incoming number> calls <answering number> at time <time>, lasting <during> seconds"
 """
-#print(texts[0])
+first_text = first_record(TEXTS_PATH)
+last_call = last_record(CALLS_PATH)
 
 print("First record of texts, <{incoming_number}> texts <{answering_number}> at time <{time}>".format(
-    incoming_number=texts[0][0],
-    answering_number=texts[0][1],
-    time=texts[0][2]
+    incoming_number=first_text[0],
+    answering_number=first_text[1],
+    time=first_text[2]
 ))
 
-#print(calls[0])
-
 print("Last record of calls, <{incoming_number}> calls <{answering_number}> at time <{time}>, lasting <{during}> seconds".format(
-    incoming_number=calls[-1][0],
-    answering_number=calls[-1][1],
-    time=calls[-1][2],
-    during=calls[-1][3]
-))
\ No newline at end of file
+    incoming_number=last_call[0],
+    answering_number=last_call[1],
+    time=last_call[2],
+    during=last_call[3]
+))
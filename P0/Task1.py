@@ -1,20 +1,28 @@
 """
 Read file into texts and calls.
-It's ok if you don't understand how to read files.
+Both files are parsed once into columns by the shared loader in records.py.
+With --approximate --no-exact nothing is loaded; the csv files are streamed
+into a HyperLogLog sketch instead, see get_approximate_counts.
 """
+import argparse
 import csv
-with open('texts.csv', 'r') as f:
-    reader = csv.reader(f)
-    texts = list(reader)
 
-with open('calls.csv', 'r') as f:
-    reader = csv.reader(f)
-    calls = list(reader)
+from hyperloglog import HyperLogLog
+from records import CALLS_PATH, TEXTS_PATH, load
+
+parser = argparse.ArgumentParser(description='Count the different telephone numbers in the records')
+parser.add_argument('--approximate', action='store_true',
+                    help='estimate the count with a HyperLogLog sketch in bounded memory')
+parser.add_argument('--precision', type=int, default=14, help='sketch precision p, using 2^p registers')
+parser.add_argument('--no-exact', dest='exact', action='store_false', help='skip the exact count')
+args = parser.parse_args()
+
+data = load() if args.exact else None
 
 
 """
 TASK 1:
-How many different telephone numbers are there in the records? 
+How many different telephone numbers are there in the records?
 Print a message:
 "There are <count> different telephone numbers in the records."
 """
@@ -27,18 +35,41 @@ def get_unique_counts():
         None
 
     Returns:
-        length of set of telephone numbers encountered in incoming and answering
-        fields of both csv.
+        number of telephone numbers encountered in incoming and answering
+        fields of both csv. The loader dictionary-encodes every number it sees
+        into one shared table, so this is just the size of that table.
     """
-    telephone_numbers = set()
-    for text in texts:
-        incoming_number, answering_number, time = text
-        telephone_numbers.update([str(incoming_number), str(answering_number)])
-    for call in calls:
-        incoming_number, answering_number, time, during = call
-        telephone_numbers.update([str(incoming_number), str(answering_number)])
-    return len(telephone_numbers)
-
-#print(len(texts), len(calls))
-print("There are <{count}> different telephone numbers in the records.".format(
-      count=get_unique_counts()))
\ No newline at end of file
+    return len(data.numbers)
+
+
+def get_approximate_counts(precision):
+    """
+    Description: Estimate the number of unique telephone numbers by streaming both
+    csv files into a HyperLogLog sketch, whose memory does not grow with the
+    number of distinct numbers
+
+    Arguments:
+        precision(int): sketch precision
+
+    Returns:
+        HyperLogLog sketch of incoming and answering fields of both csv
+    """
+    sketch = HyperLogLog(precision)
+    for path in (TEXTS_PATH, CALLS_PATH):
+        with open(path, 'r') as f:
+            for row in csv.reader(f):
+                sketch.add(row[0])
+                sketch.add(row[1])
+    return sketch
+
+
+if args.exact:
+    print("There are <{count}> different telephone numbers in the records.".format(
+          count=get_unique_counts()))
+
+if args.approximate:
+    sketch = get_approximate_counts(args.precision)
+    low, high = sketch.bounds()
+    print("Estimated <{count}> different telephone numbers (95% interval {low} - {high}, "
+          "standard error {error:.2%}, precision {precision}).".format(
+          count=sketch.count(), low=low, high=high, error=sketch.relative_error(), precision=args.precision))
@@ -1,15 +1,17 @@
 """
 Read file into texts and calls.
-It's ok if you don't understand how to read files
+Both files are parsed once into columns by the shared loader in records.py.
+If calls.csv has been partitioned by month (python partitions.py build), only
+the September 2016 segment is read instead.
 """
-import csv
-with open('texts.csv', 'r') as f:
-    reader = csv.reader(f)
-    texts = list(reader)
+import partitions
+import talktime
+from records import load, month_bounds
 
-with open('calls.csv', 'r') as f:
-    reader = csv.reader(f)
-    calls = list(reader)
+use_partitions = partitions.is_fresh()
+if not use_partitions:
+    data = load()
+    texts, calls = data.texts, data.calls
 
 """
 TASK 2: Which telephone number spent the longest time on the phone
@@ -20,25 +22,13 @@ Print a message:
 September 2016.".
 """
 
-telephone_numbers_time_map = dict()
-
-#Build map of numbers and call duration - add both incoming and outgoing minutes
-for call in calls:
-    incoming_number, answering_number, time, during = call
-    date = time.split(' ')[0]
-    month, year = date.split('-')[1], date.split('-')[2]
-    if month != '09' and year != '2016': # Check to ensure Sept 2016
-        continue
-    telephone_numbers_time_map[incoming_number] = telephone_numbers_time_map.get(incoming_number, 0) + int(during)
-    telephone_numbers_time_map[answering_number] = telephone_numbers_time_map.get(answering_number, 0) + int(during)
-
-telephone_number = None
-total_time = -1
-for number, call_duration in telephone_numbers_time_map.items():
-    # Second pass through dictionary to check for max cumulative duration
-    if call_duration > total_time:
-        total_time = call_duration
-        telephone_number = number
+# Build map of number ids and call duration within Sept 2016 - add both incoming and
+# outgoing minutes - then select the longest with a heap instead of a second loop
+if use_partitions:
+    leaders = partitions.top_talkers(1, *month_bounds(2016, 9))
+else:
+    leaders = talktime.top_talkers(calls, 1, *month_bounds(2016, 9))
+telephone_number, total_time = leaders[0] if leaders else (None, -1)
 
 print("<{telephone_number}> spent the longest time, <{total_time}> seconds, on the phone during September 2016.".format(
     telephone_number=telephone_number,
@@ -1,16 +1,11 @@
 """
 Read file into texts and calls.
-It's ok if you don't understand how to read files.
+Both files are parsed once into columns by the shared loader in records.py.
 """
-import csv
+from records import load
 
-with open('texts.csv', 'r') as f:
-    reader = csv.reader(f)
-    texts = list(reader)
-
-with open('calls.csv', 'r') as f:
-    reader = csv.reader(f)
-    calls = list(reader)
+data = load()
+texts, calls = data.texts, data.calls
 
 """
 TASK 3:
@@ -44,38 +39,17 @@ to other fixed lines in Bangalore."
 The percentage should have 2 decimal digits
 """
 
-import re
-
-incoming_parser = re.compile(r'\((?P<blr_code>080)\)') #Bangalore area code 080
-
-answering_parsers = [
-    re.compile(r'\((?P<code>0\d+)\)'), #Fixed lines start with an area code enclosed in brackets beginning with 0
-    re.compile(r'(?P<code>[789]\d{3})\d*\s\d+'), #First four digits of mobile numbers that start with 7,8,9 and have a space in the middle
-    re.compile(r'(?P<code>140)\d+') #Telemarketer area codes starting with 140
-]
-
-from_blr = 0
-from_blr_to_blr = 0
-code_set = set()
+import traffic
+from codes import BANGALORE_CODE
 
+# Both parts are slices of the origin x destination code matrix (see traffic.py),
+# built in one pass over calls
+matrix = traffic.build(calls)
+bangalore_row = matrix.row(BANGALORE_CODE)
 
-for call in calls:
-    incoming_number, answering_number, time, during = call
-    if not incoming_parser.match(incoming_number):
-        continue
-    # Proceed here only if BLR incoming
-    from_blr += 1
-    for parser in answering_parsers:
-        # Iterate through possible parsers
-        match = parser.match(answering_number)
-        if match:
-            code = match.group('code')
-            code_set.add(code)
-            if code == '080':
-                from_blr_to_blr += 1
-            # print(match.group('code'), end=': ')
-            # print(answering_number)
-            break
+code_set = set(bangalore_row) - {traffic.UNKNOWN_CODE}
+from_blr = sum(calls_made for calls_made, seconds in bangalore_row.values())
+from_blr_to_blr = bangalore_row.get(BANGALORE_CODE, (0, 0))[0]
 
 print("The numbers called by people in Bangalore have codes:")
 [print(code) for code in sorted(list(code_set))]
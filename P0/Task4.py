@@ -1,16 +1,12 @@
 """
 Read file into texts and calls.
-It's ok if you don't understand how to read files.
+Both files are parsed once into columns by the shared loader in records.py.
 """
-import csv
+from profiling import stage
+from records import IdSet, load
 
-with open('texts.csv', 'r') as f:
-    reader = csv.reader(f)
-    texts = list(reader)
-
-with open('calls.csv', 'r') as f:
-    reader = csv.reader(f)
-    calls = list(reader)
+data = load()
+texts, calls = data.texts, data.calls
 
 """
 TASK 4:
@@ -25,28 +21,28 @@ Print a message:
 The list of numbers should be print out one per line in lexicographic order with no duplicates.
 """
 
-telephone_numbers = set()
-possible_telemarketers = set()
+# Sets hold number ids from the shared number table rather than strings,
+# as one flag byte per id
+telephone_numbers = IdSet(len(data.numbers))
+possible_telemarketers = IdSet(len(data.numbers))
 
-for text in texts:
+with stage('aggregate') as aggregate:
     # Add numbers that receive or send texts to set
-    incoming_number, answering_number, time = text
-    telephone_numbers.update([str(incoming_number), str(answering_number)])
+    telephone_numbers.update(texts.incoming)
+    telephone_numbers.update(texts.answering)
 
-for call in calls:
     # Add only numbers that received calls to set
-    incoming_number, answering_number, time, during = call
-    telephone_numbers.add(str(answering_number))
+    telephone_numbers.update(calls.answering)
 
-for call in calls:
-    # Second pass through calls - iterate through incoming numbers and mark
-    # as telemarketer if not in our set
-    incoming_number, answering_number, time, during = call
-    if incoming_number not in telephone_numbers:
-        possible_telemarketers.add(incoming_number)
+    for incoming_id in calls.incoming:
+        # Second pass through calls - iterate through incoming numbers and mark
+        # as telemarketer if not in our set
+        if incoming_id not in telephone_numbers:
+            possible_telemarketers.add(incoming_id)
+    aggregate.rows = len(texts) + 2 * len(calls)
 
 print("These numbers could be telemarketers: ")
-[print(number) for number in sorted(list(possible_telemarketers))]
+[print(number) for number in sorted(data.numbers.decode(number_id) for number_id in possible_telemarketers)]
 
 
 
@@ -0,0 +1,100 @@
+"""
+Scaling benchmark for the P0 tasks.
+
+For every requested scale, synthetic texts.csv and calls.csv are generated
+(see generate.py) into WORK_DIR/<rows>, unless already there, and each task
+script is run there as a separate process. Wall time, rows per second
+(texts + calls) and peak RSS of the process are reported per task so
+regressions are visible. Derived files (records.cache, calls.partitions,
+telemarketers.json) are removed before each run so every run is cold, unless
+--warm is given.
+
+Usage:
+    python benchmark.py [--rows 1000000 10000000 100000000] [--tasks Task0 ... query]
+                        [--work-dir bench] [--warm] [--json results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from generate import generate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROWS = [1000000, 10000000, 100000000]
+DEFAULT_TASKS = ['Task0', 'Task1', 'Task2', 'Task3', 'Task4']
+DERIVED = ['records.cache', 'calls.partitions', 'telemarketers.json']
+
+
+def _clean(directory):
+    for name in DERIVED:
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def run_task(task, directory):
+    """
+    Description: Run one task script in directory and measure it
+
+    Arguments:
+        task(str): script name without .py
+        directory(str): directory holding texts.csv and calls.csv
+
+    Returns:
+        dict with wall seconds, peak RSS in KB and exit code
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, task + '.py')], cwd=directory,
+                               stdout=subprocess.DEVNULL)
+    # wait4 gives the resource usage of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    rss = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return {'seconds': time.perf_counter() - start, 'peak_rss_kb': rss, 'exit_code': process.returncode}
+
+
+def benchmark(rows_list, tasks, work_dir, warm=False):
+    """
+    Description: Run every task at every scale
+
+    Returns:
+        list of result dicts, one per (rows, task)
+    """
+    results = []
+    for rows in rows_list:
+        directory = os.path.join(work_dir, str(rows))
+        if not (os.path.exists(os.path.join(directory, 'texts.csv')) and
+                os.path.exists(os.path.join(directory, 'calls.csv'))):
+            print("Generating {:,} texts and calls in {}".format(rows, directory), file=sys.stderr)
+            generate(directory, rows)
+        for task in tasks:
+            if not warm:
+                _clean(directory)
+            result = run_task(task, directory)
+            result.update(task=task, rows=rows, rows_per_second=2 * rows / result['seconds'])
+            results.append(result)
+            print("{rows:>12,} {task:<8} {seconds:9.2f}s {rows_per_second:14,.0f} rows/s "
+                  "{peak_rss_kb:12,} KB{failed}".format(
+                      failed='' if result['exit_code'] == 0 else '  FAILED', **result))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the P0 tasks on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help='calls (and texts) per scale')
+    parser.add_argument('--tasks', nargs='+', default=DEFAULT_TASKS, help='scripts to run, without .py')
+    parser.add_argument('--work-dir', default='bench')
+    parser.add_argument('--warm', action='store_true', help='keep caches between runs')
+    parser.add_argument('--json', default=None, help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = benchmark(args.rows, args.tasks, args.work_dir, args.warm)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
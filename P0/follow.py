@@ -0,0 +1,154 @@
+"""
+Live follow mode over texts.csv and calls.csv, like tail -f (Task2, Task4).
+
+Each file is polled for appended rows by its own asyncio task; complete rows
+are fed to the incremental Task2 talk time accumulator and the Task4
+telemarketer accumulator as soon as they are read, and a publisher task
+prints the current answers every interval seconds whenever they changed.
+Existing rows are ingested first unless --from-end is given. A file that
+shrinks was rewritten (rotated, or truncated in place): the accumulators are
+reset and both files are read again from their start, so no row is counted
+twice.
+
+Usage:
+    python follow.py [texts.csv] [calls.csv] [--interval 5] [--poll 0.5] [--month 2016-09]
+"""
+import argparse
+import asyncio
+import calendar
+import contextlib
+import functools
+import itertools
+import os
+
+from query import TalkTime, Telemarketers
+from records import CALLS_PATH, TEXTS_PATH, month_bounds
+from telemarketers import read_new_rows
+
+BLOCK_ROWS = 10000  # Rows handed from the reading thread to the event loop at a time
+
+
+def read_block(path, offset, max_rows=BLOCK_ROWS):
+    """
+    Description: Up to max_rows complete rows appended to path since offset
+
+    Returns:
+        (rows, new offset) tuple
+    """
+    rows = []
+    with contextlib.closing(read_new_rows(path, offset)) as new_rows:
+        for row, offset in itertools.islice(new_rows, max_rows):
+            rows.append(row)
+    return rows, offset
+
+
+class Follower(object):
+    """
+    Description: Feeds followed rows to accumulators and publishes their messages
+    """
+    def __init__(self, accumulators, publish=print):
+        self.accumulators = accumulators
+        self.publish = publish
+        self.version = 0  # Bumped for every ingested row
+        self.published_version = 0
+        self.offsets = dict()  # path -> byte offset of the next unread row
+        self.restarts = 0  # Bumped whenever a shrunk file restarts both files
+
+    def restart(self):
+        """
+        Description: Drop everything ingested and read both files again from their start. A file
+        that shrank was rewritten, e.g. rotated or truncated in place by copytruncate, so resuming
+        the accumulators on its new contents would count the rewritten rows twice.
+        """
+        for accumulator in self.accumulators:
+            accumulator.reset()
+        for path in self.offsets:
+            self.offsets[path] = 0
+        self.restarts += 1
+        self.version += 1
+
+    async def tail(self, path, poll, from_end=False):
+        """
+        Description: Async generator of csv rows appended to path
+
+        Arguments:
+            path(str): csv file, which may not exist yet
+            poll(float): seconds between checks for new data
+            from_end(bool): skip the rows already in the file
+
+        Returns:
+            yields lists of fields, one per complete row
+        """
+        self.offsets[path] = os.path.getsize(path) if from_end and os.path.exists(path) else 0
+        while True:
+            if os.path.exists(path):
+                if os.path.getsize(path) < self.offsets[path]:
+                    self.restart()
+                restarts = self.restarts
+                rows, offset = await asyncio.to_thread(read_block, path, self.offsets[path])
+                if restarts != self.restarts:
+                    continue  # The other file restarted both while this block was read
+                self.offsets[path] = offset
+                for row in rows:
+                    yield row
+                if len(rows) == BLOCK_ROWS:  # More may be waiting, so read on without sleeping
+                    continue
+            await asyncio.sleep(poll)
+
+    async def follow_texts(self, path, poll, from_end=False):
+        async for row in self.tail(path, poll, from_end):
+            for accumulator in self.accumulators:
+                accumulator.text(*row)
+            self.version += 1
+
+    async def follow_calls(self, path, poll, from_end=False):
+        async for row in self.tail(path, poll, from_end):
+            for accumulator in self.accumulators:
+                accumulator.call(*row)
+            self.version += 1
+
+    def publish_if_changed(self):
+        if self.version == self.published_version:
+            return False
+        self.published_version = self.version
+        for accumulator in self.accumulators:
+            for line in accumulator.messages():
+                self.publish(line)
+        return True
+
+    async def publisher(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.publish_if_changed()
+
+    async def run(self, texts_path, calls_path, interval, poll, from_end=False):
+        """
+        Description: Follow both files and publish every interval seconds until cancelled
+        """
+        await asyncio.gather(self.follow_texts(texts_path, poll, from_end),
+                             self.follow_calls(calls_path, poll, from_end),
+                             self.publisher(interval))
+
+
+def _month(value):
+    year, month = value.split('-')
+    return int(year), int(month)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Keep Task2 and Task4 answers current as records are appended')
+    parser.add_argument('texts', nargs='?', default=TEXTS_PATH)
+    parser.add_argument('calls', nargs='?', default=CALLS_PATH)
+    parser.add_argument('--interval', type=float, default=5.0, help='seconds between published answers')
+    parser.add_argument('--poll', type=float, default=0.5, help='seconds between checks for new rows')
+    parser.add_argument('--month', type=_month, default=(2016, 9), help='Task2 month, yyyy-mm')
+    parser.add_argument('--from-end', action='store_true', help='only follow rows appended from now on')
+    args = parser.parse_args()
+
+    year, month = args.month
+    talk_time = TalkTime(month_bounds(year, month), label='{} {}'.format(calendar.month_name[month], year))
+    follower = Follower([talk_time, Telemarketers()], publish=functools.partial(print, flush=True))
+    try:
+        asyncio.run(follower.run(args.texts, args.calls, args.interval, args.poll, args.from_end))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,119 @@
+"""
+Synthetic texts.csv / calls.csv generator.
+
+Writes records in the same format as the real exports at any scale, drawing
+numbers from a pool that mixes fixed lines ((0xx)..., a share of them in
+Bangalore (080)), mobile numbers (7/8/9 prefix with a space) and 140
+telemarketers in configurable proportions. Telemarketers only ever make
+calls, so Task4 has something to find. Timestamps increase through the
+requested number of months and call durations are roughly exponential.
+
+Usage:
+    python generate.py OUT_DIR --calls 1000000 [--texts N] [--numbers N]
+                       [--fixed 0.3] [--mobile 0.6] [--telemarketer 0.1] [--months 1] [--seed 0]
+"""
+import argparse
+import calendar
+import csv
+import os
+import random
+
+from records import format_timestamp
+
+START = (2016, 9)
+BANGALORE_SHARE = 0.3  # of fixed lines
+AREA_CODES = ['011', '022', '033', '040', '044', '0120', '0124', '0141', '0422', '0471', '0821']
+
+
+class NumberPool(object):
+    """
+    Description: Distinct numbers of each kind to draw records from
+    """
+    def __init__(self, size, fixed, mobile, telemarketer, rng):
+        total = fixed + mobile + telemarketer
+        n_fixed = int(size * fixed / total)
+        n_telemarketer = max(int(size * telemarketer / total), 1 if telemarketer else 0)
+        n_mobile = max(size - n_fixed - n_telemarketer, 0)
+        self.rng = rng
+        self.subscribers = self._unique(n_fixed, self._fixed) + self._unique(n_mobile, self._mobile)
+        self.telemarketers = self._unique(n_telemarketer, self._telemarketer)
+        self.callers = self.subscribers + self.telemarketers
+
+    def _unique(self, count, make):
+        # Kept in the order drawn, since set order depends on the string hash seed
+        numbers = dict()
+        while len(numbers) < count:
+            numbers[make()] = None
+        numbers = list(numbers)
+        self.rng.shuffle(numbers)
+        return numbers
+
+    def _fixed(self):
+        code = '080' if self.rng.random() < BANGALORE_SHARE else self.rng.choice(AREA_CODES)
+        return '({}){}'.format(code, self.rng.randint(2000000, 9999999))
+
+    def _mobile(self):
+        return '{}{:04d} {:05d}'.format(self.rng.choice('789'), self.rng.randint(0, 9999), self.rng.randint(0, 99999))
+
+    def _telemarketer(self):
+        return '140{:07d}'.format(self.rng.randint(0, 9999999))
+
+
+def _write(path, count, months, make_row):
+    start = calendar.timegm((START[0], START[1], 1, 0, 0, 0))
+    year, month = START[0], START[1] + months
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    span = calendar.timegm((year, month, 1, 0, 0, 0)) - start
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for index in range(count):
+            # Evenly spaced, so records are in time order like the real exports
+            writer.writerow(make_row(format_timestamp(start + span * index // max(count, 1))))
+
+
+def generate(out_dir, calls, texts=None, numbers=None, fixed=0.3, mobile=0.6, telemarketer=0.1,
+             months=1, seed=0):
+    """
+    Description: Write texts.csv and calls.csv into out_dir
+
+    Arguments:
+        out_dir(str): directory, created if needed
+        calls(int): call records
+        texts(int): text records, defaults to calls
+        numbers(int): distinct numbers, defaults to calls / 20
+        fixed(float), mobile(float), telemarketer(float): relative share of each kind of number
+        months(int): months covered, starting September 2016
+        seed(int): random seed, the same arguments always produce the same files
+
+    Returns:
+        (texts path, calls path)
+    """
+    rng = random.Random(seed)
+    texts = calls if texts is None else texts
+    pool = NumberPool(numbers or max(calls // 20, 100), fixed, mobile, telemarketer, rng)
+    subscribers, callers = pool.subscribers, pool.callers
+    os.makedirs(out_dir, exist_ok=True)
+    texts_path = os.path.join(out_dir, 'texts.csv')
+    calls_path = os.path.join(out_dir, 'calls.csv')
+    _write(texts_path, texts, months,
+           lambda stamp: (rng.choice(subscribers), rng.choice(subscribers), stamp))
+    _write(calls_path, calls, months,
+           lambda stamp: (rng.choice(callers), rng.choice(subscribers), stamp, int(rng.expovariate(1 / 180.0)) + 1))
+    return texts_path, calls_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic texts.csv and calls.csv')
+    parser.add_argument('out_dir')
+    parser.add_argument('--calls', type=int, default=1000000)
+    parser.add_argument('--texts', type=int, default=None, help='defaults to --calls')
+    parser.add_argument('--numbers', type=int, default=None, help='distinct numbers, defaults to calls / 20')
+    parser.add_argument('--fixed', type=float, default=0.3)
+    parser.add_argument('--mobile', type=float, default=0.6)
+    parser.add_argument('--telemarketer', type=float, default=0.1)
+    parser.add_argument('--months', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    for path in generate(args.out_dir, args.calls, args.texts, args.numbers, args.fixed, args.mobile,
+                         args.telemarketer, args.months, args.seed):
+        print(path)
@@ -0,0 +1,109 @@
+"""
+HyperLogLog distinct count estimator.
+
+A sketch with precision p keeps m = 2^p one byte registers no matter how many
+items are added, and estimates the number of distinct items with a relative
+standard error of about 1.04 / sqrt(m) (0.81% for the default p=14, 16KB).
+
+Items are hashed with blake2b rather than the builtin hash(), which is salted
+per process, so sketches built in different processes or on different shards
+can be merged by taking the register-wise maximum.
+"""
+import hashlib
+import math
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+
+class HyperLogLog(object):
+    """
+    Description: Mergeable distinct count sketch
+    """
+    def __init__(self, precision=14):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError("precision must be between {} and {}".format(MIN_PRECISION, MAX_PRECISION))
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, item):
+        """
+        Description: Add a str item to the sketch
+
+        Arguments:
+            item(str)
+
+        Returns:
+            None
+        """
+        value = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = value >> (64 - self.precision)  # First p bits pick the register
+        rest = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1  # Position of the leftmost 1 in the remaining bits
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def merge(self, other):
+        """
+        Description: Fold another sketch of the same precision into this one
+
+        Arguments:
+            other(HyperLogLog)
+
+        Returns:
+            self
+        """
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of precision {} and {}".format(self.precision, other.precision))
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        """
+        Description: Estimated number of distinct items added
+
+        Returns:
+            int estimate
+        """
+        m = self.m
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction - linear counting over empty registers is more accurate
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def relative_error(self):
+        """
+        Returns:
+            relative standard error of count()
+        """
+        return 1.04 / math.sqrt(self.m)
+
+    def bounds(self, sigmas=2):
+        """
+        Description: Interval around count() covering the true value with the usual normal approximation
+        (about 95% for the default of two standard errors)
+
+        Returns:
+            (low, high) tuple
+        """
+        estimate = self.count()
+        spread = sigmas * self.relative_error() * estimate
+        return int(math.floor(estimate - spread)), int(math.ceil(estimate + spread))
+
+    def __len__(self):
+        return self.count()
@@ -0,0 +1,210 @@
+"""
+Parallel ingestion of texts.csv / calls.csv.
+
+The file is split into byte ranges whose boundaries are moved forward to the
+next newline, so every row belongs to exactly one range. Quoted fields holding
+newlines are therefore not supported: a boundary could land inside one. That
+case is detected, since the range ending there then holds an odd number of
+quote characters, and raises ValueError rather than splitting the row. A
+process pool parses each range with csv.reader, as the serial loader does,
+and partially aggregates it:
+    - the set of numbers seen, or a HyperLogLog sketch of them with --precision (Task1)
+    - talk time per number within a time window (Task2)
+    - codes called from Bangalore fixed lines and the (080) -> (080) counts (Task3)
+The partial results are then merged in the parent.
+
+Usage:
+    python parallel.py [texts.csv] [calls.csv] [--workers N] [--precision P]
+"""
+import argparse
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from codes import BANGALORE_CODE, is_bangalore_fixed_line, number_code
+from hyperloglog import HyperLogLog
+from records import CALLS_PATH, TEXTS_PATH, month_bounds, parse_timestamp
+
+MIN_CHUNK_BYTES = 1 << 20  # Smaller ranges cost more in process overhead than they save
+
+
+class CallAggregates(object):
+    """
+    Description: Partial (per byte range) or merged aggregates of text/call records
+    """
+    def __init__(self, precision=None):
+        self.rows = 0
+        self.numbers = set()
+        self.sketch = HyperLogLog(precision) if precision else None  # Replaces numbers when set
+        self.talk_time = dict()
+        self.codes = set()
+        self.from_blr = 0
+        self.from_blr_to_blr = 0
+
+    def merge(self, other):
+        """
+        Description: Fold another partial result into this one
+
+        Arguments:
+            other(CallAggregates)
+
+        Returns:
+            self
+        """
+        self.rows += other.rows
+        self.numbers |= other.numbers
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = HyperLogLog(other.sketch.precision)
+            self.sketch.merge(other.sketch)
+        for number, seconds in other.talk_time.items():
+            self.talk_time[number] = self.talk_time.get(number, 0) + seconds
+        self.codes |= other.codes
+        self.from_blr += other.from_blr
+        self.from_blr_to_blr += other.from_blr_to_blr
+        return self
+
+    def distinct_numbers(self):
+        """
+        Returns:
+            number of distinct numbers, estimated if a sketch was kept
+        """
+        if self.sketch is not None:
+            return self.sketch.count()
+        return len(self.numbers)
+
+    def longest_talker(self):
+        """
+        Returns:
+            (number, seconds) with the highest talk time, or (None, -1) if there were no calls in the window
+        """
+        if not self.talk_time:
+            return None, -1
+        return max(self.talk_time.items(), key=lambda item: item[1])
+
+
+def split_ranges(path, chunks):
+    """
+    Description: Split a file into at most `chunks` byte ranges, each ending just after a newline
+
+    Arguments:
+        path(str): file to split
+        chunks(int): desired number of ranges
+
+    Returns:
+        list of (start, end) byte offsets covering the whole file
+    """
+    size = os.path.getsize(path)
+    step = max(size // max(chunks, 1), MIN_CHUNK_BYTES)
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        offset = step
+        while offset < size:
+            f.seek(offset)
+            f.readline()  # Move forward to the start of the next row
+            offset = f.tell()
+            if offset >= size:
+                break
+            boundaries.append(offset)
+            offset += step
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def aggregate_range(path, start, end, window, precision=None):
+    """
+    Description: Parse the rows in [start, end) of path and aggregate them. Runs in a worker process.
+
+    Arguments:
+        path(str): csv file
+        start(int), end(int): byte range aligned to row boundaries
+        window(tuple): (start, end) epoch seconds for talk time
+        precision(int): keep a HyperLogLog sketch of this precision instead of the set of numbers
+
+    Returns:
+        CallAggregates
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+    # Escaped quotes come in pairs, so an odd count means a boundary is inside a quoted field
+    if chunk.count(b'"') % 2:
+        raise ValueError("{} bytes {}-{}: a range boundary splits a quoted field".format(path, start, end))
+    partial = CallAggregates(precision)
+    numbers = partial.sketch if partial.sketch is not None else partial.numbers
+    window_start, window_end = window
+    for row in csv.reader(io.StringIO(chunk.decode('utf-8'), newline='')):
+        partial.rows += 1
+        incoming_number, answering_number = row[0], row[1]
+        numbers.add(incoming_number)
+        numbers.add(answering_number)
+        if len(row) < 4:  # texts carry no duration
+            continue
+        during = int(row[3])
+        if window_start <= parse_timestamp(row[2]) < window_end:
+            partial.talk_time[incoming_number] = partial.talk_time.get(incoming_number, 0) + during
+            partial.talk_time[answering_number] = partial.talk_time.get(answering_number, 0) + during
+        if not is_bangalore_fixed_line(incoming_number):
+            continue
+        partial.from_blr += 1
+        code = number_code(answering_number)
+        if code is not None:
+            partial.codes.add(code)
+            if code == BANGALORE_CODE:
+                partial.from_blr_to_blr += 1
+    return partial
+
+
+def ingest(paths, workers=None, window=month_bounds(2016, 9), precision=None):
+    """
+    Description: Aggregate one or more csv files with a process pool
+
+    Arguments:
+        paths(list): csv files; texts and calls may be mixed since rows are told apart by width
+        workers(int): pool size, defaults to the cpu count
+        window(tuple): (start, end) epoch seconds for talk time, defaults to September 2016
+        precision(int): count distinct numbers with per-range HyperLogLog sketches of this precision
+
+    Returns:
+        merged CallAggregates
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, start, end) for path in paths for start, end in split_ranges(path, workers * 4)]
+    result = CallAggregates()
+    if workers == 1:
+        for path, start, end in tasks:
+            result.merge(aggregate_range(path, start, end, window, precision))
+        return result
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(aggregate_range, path, start, end, window, precision) for path, start, end in tasks]
+        for future in futures:
+            result.merge(future.result())
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Answer Task1-Task3 with parallel ingestion')
+    parser.add_argument('texts', nargs='?', default=TEXTS_PATH)
+    parser.add_argument('calls', nargs='?', default=CALLS_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--precision', type=int, default=None, help='estimate Task1 with HyperLogLog sketches')
+    args = parser.parse_args()
+
+    result = ingest([args.texts, args.calls], workers=args.workers, precision=args.precision)
+
+    print("There are <{count}> different telephone numbers in the records.".format(count=result.distinct_numbers()))
+
+    telephone_number, total_time = result.longest_talker()
+    print("<{telephone_number}> spent the longest time, <{total_time}> seconds, on the phone during September 2016.".format(
+        telephone_number=telephone_number,
+        total_time=total_time
+    ))
+
+    print("The numbers called by people in Bangalore have codes:")
+    [print(code) for code in sorted(result.codes)]
+    try:
+        print("<{percentage:.2f}%> percent of calls from fixed lines in Bangalore are calls to other fixed lines in Bangalore.".format(
+            percentage=(100.0 * result.from_blr_to_blr / result.from_blr)))
+    except ZeroDivisionError:
+        print("No calls from fixed lines in Bangalore.")
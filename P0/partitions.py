@@ -0,0 +1,211 @@
+"""
+Month partitioned layout of calls.csv for date bounded queries (Task2).
+
+The partition stage writes the calls of each calendar month into its own
+segment file inside calls.partitions/:
+    numbers.txt             newline separated number table shared by all segments
+    manifest.json           size and mtime of the calls.csv the segments were built from
+    calls-YYYY-MM.seg       int32 incoming, int32 answering, int64 timestamps,
+                            int64 durations, then a footer holding the row count
+                            and the min/max timestamp of the segment
+
+A date filtered query only reads the footers, then maps just the segments
+whose [min, max] overlaps the requested range.
+
+Usage:
+    python partitions.py build [calls.csv] [--out calls.partitions]
+    python partitions.py top [--top K] [--start dd-mm-yyyy] [--end dd-mm-yyyy]
+"""
+import argparse
+import array
+import csv
+import json
+import mmap
+import os
+import struct
+import time
+
+from records import CALLS_PATH, NumberTable, Records, parse_timestamp
+from talktime import talk_time, top_k
+
+PARTITIONS_DIR = 'calls.partitions'
+NUMBERS_NAME = 'numbers.txt'
+MANIFEST_NAME = 'manifest.json'
+SEGMENT_MAGIC = b'P0SEG\x00\x00\x01'
+SEGMENT_FOOTER = struct.Struct('<8sqqq')  # magic, rows, min timestamp, max timestamp
+
+
+def segment_name(year, month):
+    return 'calls-{:04d}-{:02d}.seg'.format(year, month)
+
+
+def _source_stamp(calls_path):
+    stat = os.stat(calls_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def build(calls_path=CALLS_PATH, out_dir=PARTITIONS_DIR):
+    """
+    Description: Split calls.csv into per month segments
+
+    Arguments:
+        calls_path(str): calls csv
+        out_dir(str): directory for the segments, created if needed; old segments are replaced
+
+    Returns:
+        dict of (year, month) -> row count
+    """
+    numbers = NumberTable()
+    months = dict()
+    with open(calls_path, 'r') as f:
+        for row in csv.reader(f):
+            timestamp = parse_timestamp(row[2])
+            key = (int(row[2][6:10]), int(row[2][3:5]))
+            records = months.get(key)
+            if records is None:
+                records = months[key] = Records(numbers, has_duration=True)
+            records.incoming.append(numbers.encode(row[0]))
+            records.answering.append(numbers.encode(row[1]))
+            records.timestamps.append(timestamp)
+            records.durations.append(int(row[3]))
+
+    os.makedirs(out_dir, exist_ok=True)
+    # Removed before any segment is touched and written again last, so an interrupted build
+    # is never mistaken for a fresh one
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for name in os.listdir(out_dir):
+        if name.endswith('.seg'):
+            os.remove(os.path.join(out_dir, name))
+    for (year, month), records in months.items():
+        with open(os.path.join(out_dir, segment_name(year, month)), 'wb') as f:
+            for column in (records.incoming, records.answering, records.timestamps, records.durations):
+                raw = column.tobytes()
+                f.write(raw)
+                f.write(b'\x00' * (-len(raw) % 8))
+            f.write(SEGMENT_FOOTER.pack(SEGMENT_MAGIC, len(records),
+                                        min(records.timestamps), max(records.timestamps)))
+    with open(os.path.join(out_dir, NUMBERS_NAME), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(numbers.numbers))
+    with open(manifest_path, 'w') as f:
+        json.dump({'source': _source_stamp(calls_path)}, f)
+    return {key: len(records) for key, records in months.items()}
+
+
+def is_fresh(calls_path=CALLS_PATH, out_dir=PARTITIONS_DIR):
+    """
+    Description: Whether out_dir holds segments built from the current calls.csv
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+        return manifest['source'] == _source_stamp(calls_path)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def read_footer(path):
+    """
+    Description: Read only the footer of a segment
+
+    Returns:
+        (rows, min timestamp, max timestamp)
+    """
+    with open(path, 'rb') as f:
+        f.seek(-SEGMENT_FOOTER.size, os.SEEK_END)
+        magic, rows, min_timestamp, max_timestamp = SEGMENT_FOOTER.unpack(f.read(SEGMENT_FOOTER.size))
+    if magic != SEGMENT_MAGIC:
+        raise ValueError("{} is not a calls segment".format(path))
+    return rows, min_timestamp, max_timestamp
+
+
+def load_numbers(out_dir=PARTITIONS_DIR):
+    numbers = NumberTable()
+    with open(os.path.join(out_dir, NUMBERS_NAME), 'r', encoding='utf-8') as f:
+        content = f.read()
+    if content:
+        numbers.numbers.extend(content.split('\n'))
+    return numbers
+
+
+def _map_segment(path, rows, numbers):
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    columns = []
+    offset = 0
+    for typecode in ('i', 'i', 'q', 'q'):
+        size = rows * array.array(typecode).itemsize
+        columns.append(view[offset:offset + size].cast(typecode))
+        offset += size + (-size % 8)
+    records = Records.from_columns(numbers, *columns)
+    records.mapping = mapped  # Keep the mapping alive as long as the columns
+    return records
+
+
+def load_segments(out_dir=PARTITIONS_DIR, start=None, end=None):
+    """
+    Description: Map the segments overlapping [start, end), skipping the rest after reading their footer
+
+    Arguments:
+        out_dir(str): partition directory
+        start(int), end(int): optional half open epoch second range
+
+    Returns:
+        list of Records, one per matching segment, sharing one NumberTable
+    """
+    numbers = load_numbers(out_dir)
+    segments = []
+    for name in sorted(os.listdir(out_dir)):
+        if not name.endswith('.seg'):
+            continue
+        path = os.path.join(out_dir, name)
+        rows, min_timestamp, max_timestamp = read_footer(path)
+        if (start is not None and max_timestamp < start) or (end is not None and min_timestamp >= end):
+            continue
+        segments.append(_map_segment(path, rows, numbers))
+    return segments
+
+
+def top_talkers(k=1, start=None, end=None, out_dir=PARTITIONS_DIR):
+    """
+    Description: talktime.top_talkers over only the segments that overlap [start, end)
+
+    Returns:
+        list of (number, seconds), longest first
+    """
+    segments = load_segments(out_dir, start, end)
+    if not segments:
+        return []
+    totals = None
+    for calls in segments:
+        totals = talk_time(calls, start, end, totals)
+    return top_k(totals, k, segments[0].numbers)
+
+
+def _date(value):
+    return parse_timestamp(value + ' 00:00:00')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Month partitioned calls')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='partition calls.csv by month')
+    build_parser.add_argument('calls', nargs='?', default=CALLS_PATH)
+    build_parser.add_argument('--out', default=PARTITIONS_DIR)
+    top_parser = commands.add_parser('top', help='top talkers in a date range')
+    top_parser.add_argument('--top', type=int, default=10)
+    top_parser.add_argument('--start', type=_date, default=None, help='first day, dd-mm-yyyy')
+    top_parser.add_argument('--end', type=_date, default=None, help='day after the last day, dd-mm-yyyy')
+    top_parser.add_argument('--dir', default=PARTITIONS_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        for (year, month), rows in sorted(build(args.calls, args.out).items()):
+            print("{:04d}-{:02d}: {} calls".format(year, month, rows))
+        print("Partitioned in {:.3f}s".format(time.perf_counter() - started))
+    else:
+        for number, seconds in top_talkers(args.top, args.start, args.end, args.dir):
+            print("<{}> <{}> seconds".format(number, seconds))
@@ -0,0 +1,150 @@
+"""
+Opt-in per-stage profiling for the P0 scripts.
+
+Set P0_PROFILE to enable it ('' and '0' leave it off):
+    P0_PROFILE=1 python Task2.py                 summary printed to stderr at exit
+    P0_PROFILE=runs.jsonl python Task2.py        summary appended to runs.jsonl as one line
+
+Library code wraps its stages (reading, csv tokenizing, parsing, aggregation,
+...) in `with stage(name) as s:` and sets s.rows; nested stages are named
+parent/child. Steps interleaved within one loop are timed by the caller and
+added with record(name, seconds, rows), without memory figures. For every
+stage the summary records wall seconds, rows, rows/sec, and the net and peak
+bytes allocated within it, as traced by tracemalloc. Tracing allocations slows
+the run down, so compare profiled runs with profiled runs. When profiling is
+off stage() and record() do nothing.
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ENV_VAR = 'P0_PROFILE'
+OFF_VALUES = ('', '0')  # Settings of ENV_VAR that leave profiling off
+
+enabled = os.environ.get(ENV_VAR, '') not in OFF_VALUES
+
+
+class Stage(object):
+    """
+    Description: Measurements of one run of a named stage
+    """
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.seconds = 0.0
+        self.allocated_bytes = 0
+        self.peak_bytes = 0
+        self.traced_peak = 0  # Highest traced memory seen by nested stages, which reset the tracemalloc peak
+
+
+class Profile(object):
+    """
+    Description: Stages recorded so far in this process, summed per name
+    """
+    def __init__(self):
+        self.stack = []
+        self.totals = dict()  # name -> summary dict, in order of first use
+        self.started = time.time()
+
+    def record(self, measured):
+        summary = self.totals.setdefault(measured.name, {
+            'calls': 0, 'seconds': 0.0, 'rows': 0, 'allocated_bytes': 0, 'peak_bytes': 0})
+        summary['calls'] += 1
+        summary['seconds'] += measured.seconds
+        summary['rows'] += measured.rows or 0
+        summary['allocated_bytes'] += measured.allocated_bytes
+        summary['peak_bytes'] = max(summary['peak_bytes'], measured.peak_bytes)
+
+    def summary(self):
+        stages = []
+        for name, totals in self.totals.items():
+            entry = dict(stage=name, **totals)
+            entry['rows_per_second'] = totals['rows'] / totals['seconds'] if totals['rows'] and totals['seconds'] else None
+            stages.append(entry)
+        return {
+            'script': os.path.basename(sys.argv[0]),
+            'argv': sys.argv[1:],
+            'started': self.started,
+            'seconds': time.time() - self.started,
+            'stages': stages,
+        }
+
+    def emit(self):
+        destination = os.environ.get(ENV_VAR)
+        summary = self.summary()
+        if destination == '1':
+            json.dump(summary, sys.stderr, indent=2)
+            sys.stderr.write('\n')
+        else:
+            with open(destination, 'a') as f:
+                f.write(json.dumps(summary) + '\n')
+
+
+_profile = None
+if enabled:
+    _profile = Profile()
+    tracemalloc.start()
+    atexit.register(_profile.emit)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Description: Measure the enclosed block as a stage when profiling is enabled
+
+    Arguments:
+        name(str): stage name, e.g. 'tokenize'
+
+    Returns:
+        context manager yielding a Stage whose rows attribute the block may set
+    """
+    if not enabled:
+        yield Stage(name)
+        return
+    if _profile.stack:
+        parent = _profile.stack[-1]
+        name = parent.name + '/' + name
+        # Keep the parent's peak so far, since this stage resets the tracemalloc peak
+        parent.traced_peak = max(parent.traced_peak, tracemalloc.get_traced_memory()[1])
+    measured = Stage(name)
+    _profile.stack.append(measured)
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield measured
+    finally:
+        measured.seconds = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, measured.traced_peak)
+        measured.allocated_bytes = current - before
+        measured.peak_bytes = peak - before
+        _profile.stack.pop()
+        if _profile.stack:
+            parent = _profile.stack[-1]
+            parent.traced_peak = max(parent.traced_peak, peak)
+        _profile.record(measured)
+
+
+def record(name, seconds, rows=None):
+    """
+    Description: Add a stage the caller timed itself, e.g. one of several steps interleaved in a
+    loop, as a child of the current stage. No memory is attributed to it.
+
+    Arguments:
+        name(str): stage name, e.g. 'parse'
+        seconds(float): time spent in it
+        rows(int): rows it handled
+    """
+    if not enabled:
+        return
+    if _profile.stack:
+        name = _profile.stack[-1].name + '/' + name
+    measured = Stage(name)
+    measured.seconds = seconds
+    measured.rows = rows
+    _profile.record(measured)
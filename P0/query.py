@@ -0,0 +1,229 @@
+"""
+Fused query engine answering Task0 - Task4 in one streaming pass.
+
+Each task is an accumulator with a text() and call() hook that is fed every
+row as texts.csv and then calls.csv are streamed once, and a messages() method
+returning the lines the corresponding TaskN.py script prints.
+
+Usage:
+    python query.py [texts.csv] [calls.csv]
+"""
+import csv
+import heapq
+import sys
+
+from codes import BANGALORE_CODE, is_bangalore_fixed_line, number_code
+from records import CALLS_PATH, TEXTS_PATH, month_bounds, parse_timestamp
+
+
+class Accumulator(object):
+    """
+    Description: Base accumulator; subclasses override the hooks they need
+    """
+    def text(self, incoming_number, answering_number, time):
+        pass
+
+    def call(self, incoming_number, answering_number, time, during):
+        pass
+
+    def reset(self):
+        """
+        Description: Forget every row fed so far
+        """
+        pass
+
+    def messages(self):
+        return []
+
+
+class FirstLastRecords(Accumulator):
+    """
+    Description: Task0 - first record of texts and last record of calls
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.first_text = None
+        self.last_call = None
+
+    def text(self, incoming_number, answering_number, time):
+        if self.first_text is None:
+            self.first_text = (incoming_number, answering_number, time)
+
+    def call(self, incoming_number, answering_number, time, during):
+        self.last_call = (incoming_number, answering_number, time, during)
+
+    def messages(self):
+        lines = []
+        if self.first_text:
+            lines.append("First record of texts, <{}> texts <{}> at time <{}>".format(*self.first_text))
+        if self.last_call:
+            lines.append("Last record of calls, <{}> calls <{}> at time <{}>, lasting <{}> seconds".format(
+                *self.last_call))
+        return lines
+
+
+class DistinctNumbers(Accumulator):
+    """
+    Description: Task1 - count of different telephone numbers
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.numbers = set()
+
+    def text(self, incoming_number, answering_number, time):
+        self.numbers.add(incoming_number)
+        self.numbers.add(answering_number)
+
+    def call(self, incoming_number, answering_number, time, during):
+        self.numbers.add(incoming_number)
+        self.numbers.add(answering_number)
+
+    def messages(self):
+        return ["There are <{count}> different telephone numbers in the records.".format(count=len(self.numbers))]
+
+
+class TalkTime(Accumulator):
+    """
+    Description: Task2 - number with the longest time on the phone in a time window
+    """
+    def __init__(self, window=month_bounds(2016, 9), label='September 2016'):
+        self.start, self.end = window
+        self.label = label  # Names the window in messages()
+        self.reset()
+
+    def reset(self):
+        self.talk_time = dict()
+
+    def call(self, incoming_number, answering_number, time, during):
+        if not self.start <= parse_timestamp(time) < self.end:
+            return
+        during = int(during)
+        self.talk_time[incoming_number] = self.talk_time.get(incoming_number, 0) + during
+        self.talk_time[answering_number] = self.talk_time.get(answering_number, 0) + during
+
+    def top(self, k):
+        """
+        Returns:
+            list of the k (number, seconds) pairs with the highest talk time, longest first
+        """
+        return heapq.nlargest(k, self.talk_time.items(), key=lambda item: item[1])
+
+    def longest(self):
+        """
+        Returns:
+            (number, seconds) with the highest talk time, or (None, -1) if there were no calls in the window
+        """
+        leaders = self.top(1)
+        return leaders[0] if leaders else (None, -1)
+
+    def messages(self):
+        telephone_number, total_time = self.longest()
+        return ["<{telephone_number}> spent the longest time, <{total_time}> seconds, on the phone during "
+                "{label}.".format(telephone_number=telephone_number, total_time=total_time, label=self.label)]
+
+
+class BangaloreCodes(Accumulator):
+    """
+    Description: Task3 - codes called from Bangalore fixed lines and the (080) -> (080) percentage
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.codes = set()
+        self.from_blr = 0
+        self.from_blr_to_blr = 0
+
+    def call(self, incoming_number, answering_number, time, during):
+        if not is_bangalore_fixed_line(incoming_number):
+            return
+        self.from_blr += 1
+        code = number_code(answering_number)
+        if code is not None:
+            self.codes.add(code)
+            if code == BANGALORE_CODE:
+                self.from_blr_to_blr += 1
+
+    def messages(self):
+        lines = ["The numbers called by people in Bangalore have codes:"]
+        lines.extend(sorted(self.codes))
+        if self.from_blr:
+            lines.append("<{percentage:.2f}%> percent of calls from fixed lines in Bangalore are calls to other "
+                         "fixed lines in Bangalore.".format(percentage=(100.0 * self.from_blr_to_blr / self.from_blr)))
+        else:
+            lines.append("No calls from fixed lines in Bangalore.")
+        return lines
+
+
+class Telemarketers(Accumulator):
+    """
+    Description: Task4 - numbers that make calls but never text or receive calls. Excluded
+    numbers only ever grow, so the candidates are kept up to date as rows arrive: a caller
+    becomes a candidate unless already excluded, and is demoted as soon as it texts or
+    receives a call. This avoids walking calls a second time.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.excluded = set()
+        self.suspects = set()
+
+    def _exclude(self, number):
+        self.excluded.add(number)
+        self.suspects.discard(number)
+
+    def text(self, incoming_number, answering_number, time):
+        self._exclude(incoming_number)
+        self._exclude(answering_number)
+
+    def call(self, incoming_number, answering_number, time, during):
+        self._exclude(answering_number)
+        if incoming_number not in self.excluded:
+            self.suspects.add(incoming_number)
+
+    def candidates(self):
+        return set(self.suspects)
+
+    def messages(self):
+        return ["These numbers could be telemarketers: "] + sorted(self.suspects)
+
+
+def default_accumulators():
+    return [FirstLastRecords(), DistinctNumbers(), TalkTime(), BangaloreCodes(), Telemarketers()]
+
+
+def run(texts_path=TEXTS_PATH, calls_path=CALLS_PATH, accumulators=None):
+    """
+    Description: Stream texts and calls once, feeding every row to every accumulator
+
+    Arguments:
+        texts_path(str), calls_path(str): csv locations
+        accumulators(list): Accumulator objects, defaults to one per task
+
+    Returns:
+        list of accumulators
+    """
+    if accumulators is None:
+        accumulators = default_accumulators()
+    text_hooks = [accumulator.text for accumulator in accumulators]
+    call_hooks = [accumulator.call for accumulator in accumulators]
+    with open(texts_path, 'r') as f:
+        for row in csv.reader(f):
+            for hook in text_hooks:
+                hook(*row)
+    with open(calls_path, 'r') as f:
+        for row in csv.reader(f):
+            for hook in call_hooks:
+                hook(*row)
+    return accumulators
+
+
+if __name__ == '__main__':
+    for accumulator in run(*sys.argv[1:3]):
+        for line in accumulator.messages():
+            print(line)
@@ -0,0 +1,536 @@
+"""
+Shared loader for texts.csv and calls.csv.
+
+Every task used to re-parse both files with csv.reader into lists of lists of
+strings. Instead, each file is parsed exactly once into columns:
+    - phone numbers are dictionary-encoded into a NumberTable shared by texts
+      and calls, so every distinct number is stored once as a str and the
+      records only hold its integer id
+    - timestamps are parsed into integer epoch seconds
+    - call durations are parsed into integers
+
+Usage:
+    from records import load
+    data = load()
+    data.texts.record(0)    # ('97424 22395', '90365 06212', '01-09-2016 06:03:22')
+    data.calls.record(-1)
+
+The parsed columns are saved to a binary cache file (records.cache next to
+calls.csv) which later loads memory-map instead of re-tokenizing the csv files.
+The cache is rebuilt automatically whenever the size or mtime of either csv
+file changes.
+
+first_record() and last_record() read a single record without loading the
+file; last_record() seeks backwards from the end, so both take constant time
+and memory regardless of the file size.
+
+Running this module directly loads the csv files in the current directory and
+reports parse time and resident memory.
+"""
+import array
+import calendar
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+import time
+
+import profiling
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+TEXTS_PATH = 'texts.csv'
+CALLS_PATH = 'calls.csv'
+CACHE_NAME = 'records.cache'
+TIME_FORMAT = '%d-%m-%Y %H:%M:%S'
+TAIL_BLOCK_BYTES = 4096
+
+# Cache layout: header, then each column padded to 8 bytes in the order
+#   texts incoming(int32) answering(int32) timestamps(int64)
+#   calls incoming(int32) answering(int32) timestamps(int64) durations(int64)
+#   number table as newline separated utf-8
+# The header records size and mtime of both source files so a stale cache is detected.
+# Columns are written in native byte order, so a cache is only valid on the machine that wrote it.
+CACHE_MAGIC = b'P0RECS\x00\x01'
+CACHE_HEADER = struct.Struct('<8s8q')  # magic, texts size/mtime, calls size/mtime, n_texts, n_calls, n_numbers, table bytes
+
+
+def parse_timestamp(stamp):
+    """
+    Description: Convert a record time string into epoch seconds (UTC, since the
+    records carry no timezone). Slicing the fixed width fields is several times
+    faster than time.strptime.
+
+    Arguments:
+        stamp(str): time in the form dd-mm-yyyy hh:mm:ss
+
+    Returns:
+        int seconds since epoch
+    """
+    return calendar.timegm((int(stamp[6:10]), int(stamp[3:5]), int(stamp[0:2]),
+                            int(stamp[11:13]), int(stamp[14:16]), int(stamp[17:19])))
+
+
+def format_timestamp(seconds):
+    """
+    Description: Inverse of parse_timestamp
+
+    Arguments:
+        seconds(int): seconds since epoch
+
+    Returns:
+        time string in the form dd-mm-yyyy hh:mm:ss
+    """
+    return time.strftime(TIME_FORMAT, time.gmtime(seconds))
+
+
+def month_bounds(year, month):
+    """
+    Description: Half open epoch second range [start, end) covering a calendar month
+
+    Arguments:
+        year(int), month(int)
+
+    Returns:
+        (start, end) tuple
+    """
+    start = calendar.timegm((year, month, 1, 0, 0, 0))
+    if month == 12:
+        end = calendar.timegm((year + 1, 1, 1, 0, 0, 0))
+    else:
+        end = calendar.timegm((year, month + 1, 1, 0, 0, 0))
+    return start, end
+
+
+def peak_rss_kb():
+    """
+    Description: Peak resident set size of this process in KB, or None if unknown
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':  # macOS reports bytes, Linux reports KB
+        rss //= 1024
+    return rss
+
+
+def first_record(path):
+    """
+    Description: First record of a csv file, reading only as much as that record needs
+
+    Arguments:
+        path(str): csv file
+
+    Returns:
+        list of fields, or None if the file is empty
+    """
+    with open(path, 'r', newline='') as f:
+        return next(csv.reader(f), None)
+
+
+def _last_record_start(body):
+    """
+    Description: Offset of the last record in body, or None if body may not hold all of it.
+    A newline ends a record only if it is outside quotes, i.e. the text after it holds
+    an even number of quote characters (escaped quotes come in pairs).
+    """
+    index = len(body)
+    while True:
+        index = body.rfind(b'\n', 0, index)
+        if index == -1:
+            return None
+        if body.count(b'"', index + 1) % 2 == 0:
+            return index + 1
+
+
+def last_record(path, block_size=TAIL_BLOCK_BYTES):
+    """
+    Description: Last record of a csv file, found by reading blocks backwards from
+    the end until the start of the last record is seen. Trailing newlines are
+    ignored and quoted fields may contain newlines.
+
+    Arguments:
+        path(str): csv file
+        block_size(int): bytes read per step
+
+    Returns:
+        list of fields, or None if the file is empty
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        tail = b''
+        while True:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+            body = tail.rstrip(b'\r\n')
+            start = _last_record_start(body)
+            if start is not None:
+                break
+            if position == 0:  # The whole file is a single record
+                start = 0
+                break
+    record = body[start:].decode('utf-8')
+    if not record:
+        return None
+    return next(csv.reader(io.StringIO(record, newline='')), None)
+
+
+class NumberTable(object):
+    """
+    Description: Dictionary encoding of phone numbers into dense integer ids
+    """
+    def __init__(self):
+        self.numbers = list()  # id -> number
+        self._ids = None  # number -> id, built lazily when a table is restored from cache
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {number: number_id for number_id, number in enumerate(self.numbers)}
+        return self._ids
+
+    def encode(self, number):
+        """
+        Description: Return id for number, assigning the next free id if it was not seen before
+        """
+        number_id = self.ids.get(number)
+        if number_id is None:
+            number_id = len(self.numbers)
+            self.ids[number] = number_id
+            self.numbers.append(number)
+        return number_id
+
+    def decode(self, number_id):
+        return self.numbers[number_id]
+
+    def __len__(self):
+        return len(self.numbers)
+
+
+class IdSet(object):
+    """
+    Description: Set of number ids backed by one flag byte per id of a NumberTable,
+    in place of a set of number strings
+    """
+    def __init__(self, size):
+        self.flags = bytearray(size)
+
+    def add(self, number_id):
+        self.flags[number_id] = 1
+
+    def update(self, number_ids):
+        flags = self.flags
+        for number_id in number_ids:
+            flags[number_id] = 1
+
+    def __contains__(self, number_id):
+        return self.flags[number_id] == 1
+
+    def __iter__(self):
+        return (number_id for number_id, flag in enumerate(self.flags) if flag)
+
+    def __len__(self):
+        return len(self.flags) - self.flags.count(0)
+
+
+def id_array(size, typecode='q'):
+    """
+    Description: Zeroed flat array with one slot per number id, in place of a dict keyed by number
+    """
+    return array.array(typecode, bytes(size * array.array(typecode).itemsize))
+
+
+class Records(object):
+    """
+    Description: Columnar store of text or call records. Numbers are ids into a
+    shared NumberTable; durations is None for texts.
+    """
+    def __init__(self, numbers, has_duration):
+        self.numbers = numbers
+        self.incoming = array.array('i')
+        self.answering = array.array('i')
+        self.timestamps = array.array('q')
+        self.durations = array.array('q') if has_duration else None
+
+    @classmethod
+    def from_columns(cls, numbers, incoming, answering, timestamps, durations=None):
+        """
+        Description: Wrap already built columns (arrays or memoryviews of a mapped cache)
+        """
+        records = cls(numbers, has_duration=durations is not None)
+        records.incoming = incoming
+        records.answering = answering
+        records.timestamps = timestamps
+        records.durations = durations
+        return records
+
+    def append(self, incoming_number, answering_number, stamp, during=None):
+        """
+        Description: Encode and append one csv row
+        """
+        self.incoming.append(self.numbers.encode(incoming_number))
+        self.answering.append(self.numbers.encode(answering_number))
+        self.timestamps.append(parse_timestamp(stamp))
+        if self.durations is not None:
+            self.durations.append(int(during))
+
+    def record(self, index):
+        """
+        Description: Decode a record back into its csv fields
+
+        Arguments:
+            index(int): position of record, negative indices count from the end
+
+        Returns:
+            tuple of strings in the csv column order
+        """
+        fields = (self.numbers.decode(self.incoming[index]),
+                  self.numbers.decode(self.answering[index]),
+                  format_timestamp(self.timestamps[index]))
+        if self.durations is not None:
+            fields += (str(self.durations[index]),)
+        return fields
+
+    def __len__(self):
+        return len(self.incoming)
+
+
+class Dataset(object):
+    """
+    Description: texts and calls Records sharing one NumberTable, with load statistics
+    """
+    def __init__(self):
+        self.numbers = NumberTable()
+        self.texts = Records(self.numbers, has_duration=False)
+        self.calls = Records(self.numbers, has_duration=True)
+        self.parse_seconds = 0.0
+        self.rss_kb = None
+        self.source = 'csv'  # or 'cache' when columns are mapped from the binary cache
+        self._mmap = None  # Keeps the cache mapping alive for the memoryview columns
+
+    def report(self, stream=sys.stderr):
+        """
+        Description: Print parse time and resident memory
+        """
+        print("Loaded {texts} texts and {calls} calls ({numbers} distinct numbers) from {source} in {seconds:.3f}s, "
+              "peak RSS {rss} KB".format(texts=len(self.texts), calls=len(self.calls),
+                                         numbers=len(self.numbers), source=self.source,
+                                         seconds=self.parse_seconds, rss=self.rss_kb), file=stream)
+
+
+def _read_into(path, records):
+    if profiling.enabled:
+        _read_into_staged(path, records)
+        return
+    with open(path, 'r') as f:
+        for row in csv.reader(f):
+            records.append(*row)
+
+
+def _read_into_staged(path, records):
+    """
+    Description: _read_into with its time split between reading and tokenizing the csv and
+    parsing the rows. Both happen row by row in the same streaming loop as _read_into, so each
+    row is timed and the two totals are recorded as child stages of one stage for the file.
+    """
+    name = os.path.basename(path)
+    clock = time.perf_counter
+    tokenize_seconds = parse_seconds = 0.0
+    rows = 0
+    with profiling.stage(name) as stage:
+        with open(path, 'r') as f:
+            reader = csv.reader(f)
+            while True:
+                start = clock()
+                row = next(reader, None)
+                tokenized = clock()
+                tokenize_seconds += tokenized - start
+                if row is None:
+                    break
+                records.append(*row)
+                parse_seconds += clock() - tokenized
+                rows += 1
+        stage.rows = rows
+        profiling.record('read+tokenize', tokenize_seconds, rows)
+        profiling.record('parse', parse_seconds, rows)
+
+
+def _source_stamp(texts_path, calls_path):
+    texts_stat, calls_stat = os.stat(texts_path), os.stat(calls_path)
+    return (texts_stat.st_size, texts_stat.st_mtime_ns, calls_stat.st_size, calls_stat.st_mtime_ns)
+
+
+def _pad(length):
+    return -length % 8
+
+
+def write_cache(data, cache_path, stamp):
+    """
+    Description: Save the columns of a csv parsed Dataset to cache_path. The file is
+    written next to its final location and renamed into place so readers never
+    see a partial cache.
+
+    Arguments:
+        data(Dataset): parsed dataset
+        cache_path(str): destination
+        stamp(tuple): size and mtime of texts and calls, from _source_stamp
+
+    Returns:
+        None
+    """
+    table = '\n'.join(data.numbers.numbers).encode('utf-8')
+    columns = [data.texts.incoming, data.texts.answering, data.texts.timestamps,
+               data.calls.incoming, data.calls.answering, data.calls.timestamps, data.calls.durations]
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, *stamp, len(data.texts), len(data.calls),
+                                  len(data.numbers), len(table)))
+        for column in columns:
+            raw = column.tobytes()
+            f.write(raw)
+            f.write(b'\x00' * _pad(len(raw)))
+        f.write(table)
+    os.replace(tmp_path, cache_path)
+
+
+def read_cache(cache_path, stamp):
+    """
+    Description: Map a cache file written by write_cache. The columns are memoryviews
+    straight into the mapping so nothing is copied; only the number table is decoded.
+
+    Arguments:
+        cache_path(str): cache location
+        stamp(tuple): current size and mtime of texts and calls
+
+    Returns:
+        Dataset, or None if the cache is missing, corrupt or stale
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # Missing, unreadable or empty file
+        return None
+    if len(mapped) < CACHE_HEADER.size:
+        return None
+    magic, *header = CACHE_HEADER.unpack_from(mapped)
+    cached_stamp, (n_texts, n_calls, n_numbers, table_bytes) = tuple(header[:4]), header[4:]
+    if magic != CACHE_MAGIC or cached_stamp != stamp:
+        return None
+    column_bytes = [length * struct.calcsize(typecode) for typecode, length in
+                    (('i', n_texts), ('i', n_texts), ('q', n_texts),
+                     ('i', n_calls), ('i', n_calls), ('q', n_calls), ('q', n_calls))]
+    if len(mapped) != CACHE_HEADER.size + sum(size + _pad(size) for size in column_bytes) + table_bytes:
+        return None  # Truncated, e.g. by a full disk
+
+    view = memoryview(mapped)
+    offset = CACHE_HEADER.size
+
+    def column(typecode, length):
+        nonlocal offset
+        size = length * struct.calcsize(typecode)
+        col = view[offset:offset + size].cast(typecode)
+        offset += size + _pad(size)
+        return col
+
+    data = Dataset()
+    data.texts = Records.from_columns(data.numbers, column('i', n_texts), column('i', n_texts),
+                                      column('q', n_texts))
+    data.calls = Records.from_columns(data.numbers, column('i', n_calls), column('i', n_calls),
+                                      column('q', n_calls), column('q', n_calls))
+    try:
+        table = bytes(view[offset:offset + table_bytes]).decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    data.numbers.numbers.extend(table.split('\n') if n_numbers else [])
+    if len(data.numbers) != n_numbers:
+        return None
+    data.source = 'cache'
+    data._mmap = mapped
+    return data
+
+
+def load(texts_path=TEXTS_PATH, calls_path=CALLS_PATH, report=False, cache=True, cache_path=None):
+    """
+    Description: Load texts and calls csv files into a columnar Dataset, mapping the
+    binary cache when it is up to date and otherwise parsing the csv files once
+    and refreshing the cache.
+
+    Arguments:
+        texts_path(str), calls_path(str): csv locations
+        report(bool): print load time and resident memory to stderr
+        cache(bool): use and maintain the binary cache
+        cache_path(str): cache location, defaults to records.cache next to calls_path
+
+    Returns:
+        Dataset
+    """
+    with profiling.stage('load') as stage:
+        data = _load(texts_path, calls_path, cache, cache_path)
+        stage.rows = len(data.texts) + len(data.calls)
+    if report:
+        data.report()
+    return data
+
+
+def _load(texts_path, calls_path, cache, cache_path):
+    start = time.perf_counter()
+    data = None
+    if cache:
+        if cache_path is None:
+            cache_path = os.path.join(os.path.dirname(calls_path), CACHE_NAME)
+        stamp = _source_stamp(texts_path, calls_path)
+        with profiling.stage('read cache'):
+            data = read_cache(cache_path, stamp)
+    if data is None:
+        data = Dataset()
+        _read_into(texts_path, data.texts)
+        _read_into(calls_path, data.calls)
+        if cache:
+            try:
+                with profiling.stage('write cache'):
+                    write_cache(data, cache_path, stamp)
+            except OSError:  # e.g. read-only directory; carry on uncached
+                pass
+    data.parse_seconds = time.perf_counter() - start
+    data.rss_kb = peak_rss_kb()
+    return data
+
+
+def _deep_size(container):
+    return sys.getsizeof(container) + sum(sys.getsizeof(item) for item in container)
+
+
+def interning_report(data, stream=sys.stderr):
+    """
+    Description: Compare the memory of the id based structures the tasks use against
+    the sets and dicts of number strings they used before
+    """
+    numbers = data.numbers.numbers
+    string_set = set(numbers)  # Task1/Task4 style set of every number
+    string_map = dict.fromkeys(numbers, 0)  # Task2 style number -> seconds
+    id_set = IdSet(len(numbers))
+    id_set.update(range(len(numbers)))
+    seconds = id_array(len(numbers))
+    # The number table itself is shared by every structure and only paid once
+    table = _deep_size(numbers)
+    rows = [
+        ('set of numbers', _deep_size(string_set), table + sys.getsizeof(id_set.flags)),
+        ('number -> seconds', _deep_size(string_map) + sys.getsizeof(0) * len(numbers),
+         table + sys.getsizeof(seconds)),
+    ]
+    for name, before, after in rows:
+        print("{name}: {before:,} bytes as str, {after:,} bytes as ids ({saving:.0%} saved, "
+              "{extra:,} bytes per extra structure)".format(
+                  name=name, before=before, after=after, saving=1 - after / before if before else 0,
+                  extra=after - table), file=stream)
+
+
+if __name__ == '__main__':
+    interning_report(load(*sys.argv[1:3], report=True))
@@ -0,0 +1,129 @@
+"""
+Talk time leaderboards over the columnar calls loaded by records.py (Task2).
+
+Timestamps are parsed once per row by the loader, so date filtering is an
+integer comparison. The top K numbers are selected with a heap in
+O(n log K) instead of a second full pass per query. Totals are kept in a flat
+array indexed by number id rather than a dict keyed by number.
+
+Usage:
+    python talktime.py [--top K] [--start dd-mm-yyyy] [--end dd-mm-yyyy] [--by-month]
+"""
+import argparse
+import heapq
+import time
+
+import profiling
+from records import format_timestamp, id_array, load, month_bounds, parse_timestamp
+
+
+def talk_time(calls, start=None, end=None, totals=None):
+    """
+    Description: Total seconds on the phone, incoming and answering, per number id
+
+    Arguments:
+        calls(Records): columnar calls
+        start(int), end(int): optional half open epoch second range [start, end)
+        totals(array): optional per id totals to add to, e.g. from another segment
+
+    Returns:
+        array of seconds indexed by number id
+    """
+    if totals is None:
+        totals = id_array(len(calls.numbers))
+    with profiling.stage('aggregate') as stage:
+        for incoming_id, answering_id, timestamp, during in zip(
+                calls.incoming, calls.answering, calls.timestamps, calls.durations):
+            if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                continue
+            totals[incoming_id] += during
+            totals[answering_id] += during
+        stage.rows = len(calls)
+    return totals
+
+
+def top_k(totals, k, numbers):
+    """
+    Description: K largest totals, decoded to numbers. Ties keep the lower number id.
+
+    Arguments:
+        totals(array or dict): seconds indexed or keyed by number id; zero totals are skipped
+        k(int): leaderboard size
+        numbers(NumberTable): table to decode ids
+
+    Returns:
+        list of (number, seconds), longest first
+    """
+    items = totals.items() if isinstance(totals, dict) else enumerate(totals)
+    with profiling.stage('select') as stage:
+        leaders = heapq.nlargest(k, (item for item in items if item[1]), key=lambda item: item[1])
+        stage.rows = len(totals)
+    return [(numbers.decode(number_id), seconds) for number_id, seconds in leaders]
+
+
+def top_talkers(calls, k=1, start=None, end=None):
+    """
+    Description: Numbers with the most time on the phone in a date range
+
+    Arguments:
+        calls(Records): columnar calls
+        k(int): leaderboard size
+        start(int), end(int): optional half open epoch second range [start, end)
+
+    Returns:
+        list of (number, seconds), longest first
+    """
+    return top_k(talk_time(calls, start, end), k, calls.numbers)
+
+
+def top_talkers_by_month(calls, k=1):
+    """
+    Description: Leaderboard for every calendar month in one pass over calls. The month
+    of a row is only recomputed when its timestamp leaves the bounds of the previous
+    row's month, which for time ordered records is once per month.
+
+    Arguments:
+        calls(Records): columnar calls
+        k(int): leaderboard size
+
+    Returns:
+        dict of (year, month) -> list of (number, seconds), longest first
+    """
+    # A dict per month rather than an id array, as most numbers are absent from any one month
+    months = dict()
+    month_start, month_end, totals = 0, 0, None
+    for incoming_id, answering_id, timestamp, during in zip(
+            calls.incoming, calls.answering, calls.timestamps, calls.durations):
+        if not month_start <= timestamp < month_end:
+            year, month = time.gmtime(timestamp)[:2]
+            month_start, month_end = month_bounds(year, month)
+            totals = months.setdefault((year, month), dict())
+        totals[incoming_id] = totals.get(incoming_id, 0) + during
+        totals[answering_id] = totals.get(answering_id, 0) + during
+    return {key: top_k(totals, k, calls.numbers) for key, totals in sorted(months.items())}
+
+
+def _date(value):
+    return parse_timestamp(value + ' 00:00:00')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Top talkers by total time on the phone')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--start', type=_date, default=None, help='first day, dd-mm-yyyy')
+    parser.add_argument('--end', type=_date, default=None, help='day after the last day, dd-mm-yyyy')
+    parser.add_argument('--by-month', action='store_true', help='one leaderboard per calendar month')
+    args = parser.parse_args()
+
+    calls = load().calls
+    if args.by_month:
+        for (year, month), leaders in top_talkers_by_month(calls, args.top).items():
+            print("{:04d}-{:02d}".format(year, month))
+            for number, seconds in leaders:
+                print("  <{}> <{}> seconds".format(number, seconds))
+    else:
+        start = format_timestamp(args.start) if args.start is not None else 'start'
+        end = format_timestamp(args.end) if args.end is not None else 'end'
+        print("Top {} talkers from {} to {}".format(args.top, start, end))
+        for number, seconds in top_talkers(calls, args.top, args.start, args.end):
+            print("<{}> <{}> seconds".format(number, seconds))
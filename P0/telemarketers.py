@@ -0,0 +1,194 @@
+"""
+Incremental telemarketer detection over appended record batches (Task4).
+
+The detector keeps the Task4 state (numbers that texted or received a call,
+and the current suspects) together with a watermark per file: the byte offset
+just past the last complete row it has ingested. Each run only reads the rows
+appended since then, updates the suspects and saves the state again. A
+suspect that later texts or receives a call is demoted as soon as that row is
+ingested.
+
+If a csv file is found to be shorter than its watermark it was truncated or
+replaced, so the state is discarded and both files are ingested from the start.
+
+Usage:
+    python telemarketers.py [texts.csv] [calls.csv] [--state telemarketers.json]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+
+from query import Telemarketers
+from records import CALLS_PATH, TEXTS_PATH
+
+STATE_PATH = 'telemarketers.json'
+BLOCK_BYTES = 1 << 16  # Read backwards per step when looking for the last newline
+
+
+class _Range(io.RawIOBase):
+    """
+    Description: Readable view of an open binary file from its current position up to end
+    """
+    def __init__(self, f, end):
+        self.f = f
+        self.remaining = end - f.tell()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self.f.readinto(memoryview(buffer)[:self.remaining])
+        self.remaining -= size
+        return size
+
+
+def _complete_end(f, offset):
+    """
+    Description: Offset just past the last newline at or after offset, or offset if there is none.
+    Blocks are read backwards from the end, so only the trailing partial row is scanned.
+    """
+    position = f.seek(0, os.SEEK_END)
+    while position > offset:
+        step = min(BLOCK_BYTES, position - offset)
+        position -= step
+        f.seek(position)
+        index = f.read(step).rfind(b'\n')
+        if index != -1:
+            return position + index + 1
+    return offset
+
+
+def read_new_rows(path, offset):
+    """
+    Description: Rows appended to a csv file since offset, parsed while the file is streamed
+    through csv.reader exactly as csv.reader(f) would, so memory does not grow with the
+    amount appended. Reading stops at the last newline; a trailing partial row, still being
+    written, is left for the next call, as is a row whose quoted field is still open there.
+
+    Arguments:
+        path(str): csv file
+        offset(int): byte offset to resume from
+
+    Returns:
+        yields (row, offset just past the row) tuples
+    """
+    with open(path, 'rb') as f:
+        end = _complete_end(f, offset)
+        f.seek(offset)
+        text = io.TextIOWrapper(io.BufferedReader(_Range(f, end)), encoding='utf-8', newline='')
+        position = offset
+        exhausted = False
+
+        def lines():
+            nonlocal position, exhausted
+            for line in text:
+                position += len(line.encode('utf-8'))
+                yield line
+            exhausted = True
+
+        for row in csv.reader(lines()):
+            if exhausted:  # csv.reader ran out of lines inside a quoted field
+                return
+            yield row, position
+
+
+class TelemarketerDetector(Telemarketers):
+    """
+    Description: Task4 accumulator with byte offset watermarks and saved state
+    """
+    def __init__(self, texts_path=TEXTS_PATH, calls_path=CALLS_PATH):
+        super().__init__()
+        self.texts_path = texts_path
+        self.calls_path = calls_path
+        self.offsets = {'texts': 0, 'calls': 0}
+
+    def _reset(self):
+        """
+        Description: Forget everything ingested, so both files are read again from the start
+        """
+        self.reset()
+        self.offsets = {'texts': 0, 'calls': 0}
+
+    def _truncated(self):
+        return (os.path.getsize(self.texts_path) < self.offsets['texts'] or
+                os.path.getsize(self.calls_path) < self.offsets['calls'])
+
+    def ingest(self):
+        """
+        Description: Ingest rows appended to texts and calls since the watermarks
+
+        Arguments:
+            None
+
+        Returns:
+            (new texts, new calls) row counts
+        """
+        if self._truncated():
+            self._reset()
+        # Exclusion is permanent, so the order rows are applied in does not change the result
+        return (self._ingest_file('texts', self.texts_path, self.text),
+                self._ingest_file('calls', self.calls_path, self.call))
+
+    def _ingest_file(self, name, path, hook):
+        """
+        Description: Feed the rows appended to path to hook, moving its watermark past each one
+        """
+        rows = 0
+        for row, offset in read_new_rows(path, self.offsets[name]):
+            hook(*row)
+            self.offsets[name] = offset
+            rows += 1
+        return rows
+
+    def save(self, path=STATE_PATH):
+        """
+        Description: Write the detector state to path, replacing it atomically
+        """
+        state = {
+            'texts_path': self.texts_path,
+            'calls_path': self.calls_path,
+            'offsets': self.offsets,
+            'excluded': sorted(self.excluded),
+            'suspects': sorted(self.suspects),
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=STATE_PATH, texts_path=TEXTS_PATH, calls_path=CALLS_PATH):
+        """
+        Description: Restore a detector saved for the same files, or start a new one
+
+        Returns:
+            TelemarketerDetector
+        """
+        detector = cls(texts_path, calls_path)
+        try:
+            with open(path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return detector
+        if (state.get('texts_path'), state.get('calls_path')) != (texts_path, calls_path):
+            return detector
+        detector.offsets = state['offsets']
+        detector.excluded = set(state['excluded'])
+        detector.suspects = set(state['suspects'])
+        return detector
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Update the telemarketer list with newly appended records')
+    parser.add_argument('texts', nargs='?', default=TEXTS_PATH)
+    parser.add_argument('calls', nargs='?', default=CALLS_PATH)
+    parser.add_argument('--state', default=STATE_PATH)
+    args = parser.parse_args()
+
+    detector = TelemarketerDetector.load(args.state, args.texts, args.calls)
+    detector.ingest()
+    detector.save(args.state)
+    for line in detector.messages():
+        print(line)
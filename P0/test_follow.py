@@ -0,0 +1,106 @@
+"""
+Tests for follow mode, driving Follower.run over temporary files a test appends to.
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from follow import Follower, read_block
+from query import TalkTime, Telemarketers
+from records import month_bounds
+
+POLL = 0.01
+INTERVAL = 0.03
+TIMEOUT = 5.0
+
+
+def answers(longest, seconds, suspects):
+    return (["<{}> spent the longest time, <{}> seconds, on the phone during September 2016.".format(longest, seconds),
+             "These numbers could be telemarketers: "] + suspects)
+
+
+class TestFollower(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.texts_path = os.path.join(directory.name, 'texts.csv')
+        self.calls_path = os.path.join(directory.name, 'calls.csv')
+        self.published = []
+
+    def append(self, path, content, mode='a'):
+        with open(path, mode) as f:
+            f.write(content)
+
+    async def published_ends_with(self, expected):
+        # Wait for the latest published answers, one line per publish call
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + TIMEOUT
+        while self.published[-len(expected):] != expected:
+            if loop.time() > deadline:
+                self.fail("expected {} to be published, last lines were {}".format(
+                    expected, self.published[-len(expected):]))
+            await asyncio.sleep(POLL)
+
+    def test_follow_appends_partial_rows_demotion_and_rewrites(self):
+        self.append(self.texts_path, '', 'w')
+        self.append(self.calls_path, '1401,(080)2001,01-09-2016 06:00:00,100\n'
+                                     '1401,(080)2002,01-09-2016 06:10:00,50\n', 'w')
+
+        async def scenario():
+            follower = Follower([TalkTime(month_bounds(2016, 9)), Telemarketers()], publish=self.published.append)
+            running = asyncio.ensure_future(follower.run(self.texts_path, self.calls_path, INTERVAL, POLL))
+            try:
+                await self.published_ends_with(answers('1401', 150, ['1401']))
+
+                # A text from the suspect demotes it; the call row still being written is not read yet
+                self.append(self.calls_path, '1401,(080)2003,01-09-2016 08:00:00,')
+                self.append(self.texts_path, '1401,(080)2004,01-09-2016 07:00:00\n')
+                await self.published_ends_with(answers('1401', 150, []))
+
+                self.append(self.calls_path, '30\n')
+                await self.published_ends_with(answers('1401', 180, []))
+
+                # Truncated in place and rewritten with its first row, copytruncate style: the totals
+                # are rebuilt from the files, so 1401 is back to 100 seconds rather than 280
+                self.append(self.calls_path, '1401,(080)2001,01-09-2016 06:00:00,100\n', 'w')
+                await self.published_ends_with(answers('1401', 100, []))
+
+                # Rotated to a new, shorter file; the text still demotes 1401 but not 1409
+                self.append(self.calls_path, '1409,(080)2005,01-09-2016 09:00:00,5\n', 'w')
+                await self.published_ends_with(answers('1409', 5, ['1409']))
+            finally:
+                running.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await running
+
+        asyncio.run(scenario())
+
+    def test_read_block_is_bounded(self):
+        self.append(self.calls_path, ''.join('14{:02d},(080)2001,01-09-2016 06:00:00,1\n'.format(index)
+                                             for index in range(5)) + '1405,(080)', 'w')
+        rows, offset = read_block(self.calls_path, 0, max_rows=2)
+        self.assertEqual([row[0] for row in rows], ['1400', '1401'])
+        rows, offset = read_block(self.calls_path, offset, max_rows=10)
+        self.assertEqual([row[0] for row in rows], ['1402', '1403', '1404'])
+        self.assertEqual(read_block(self.calls_path, offset), ([], offset))  # Partial row left for later
+
+    def test_nothing_published_until_rows_arrive(self):
+        async def scenario():
+            follower = Follower([Telemarketers()], publish=self.published.append)
+            running = asyncio.ensure_future(follower.run(self.texts_path, self.calls_path, INTERVAL, POLL))
+            try:
+                await asyncio.sleep(4 * INTERVAL)
+                self.assertEqual(self.published, [])  # Files do not exist yet
+                self.append(self.calls_path, '1401,(080)2001,01-09-2016 06:00:00,100\n', 'w')
+                await self.published_ends_with(["These numbers could be telemarketers: ", '1401'])
+            finally:
+                running.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await running
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
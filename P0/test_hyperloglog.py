@@ -0,0 +1,53 @@
+"""
+Tests for the HyperLogLog sketch. Items are hashed with blake2b, so every run sees the same registers.
+"""
+import unittest
+
+from hyperloglog import MAX_PRECISION, MIN_PRECISION, HyperLogLog
+
+
+def numbers(start, stop):
+    return ['({:03d}){:07d}'.format(index % 1000, index) for index in range(start, stop)]
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_merged_shards_equal_one_sketch(self):
+        items = numbers(0, 30000)
+        whole = HyperLogLog(12)
+        whole.update(items)
+        # Overlapping, unevenly sized shards, as parallel ingestion produces
+        merged = HyperLogLog(12)
+        for start, stop in ((0, 1000), (500, 17000), (17000, 30000), (29000, 30000)):
+            shard = HyperLogLog(12)
+            shard.update(items[start:stop])
+            self.assertIs(merged.merge(shard), merged)
+        self.assertEqual(merged.registers, whole.registers)
+        self.assertEqual(merged.count(), whole.count())
+        self.assertEqual(HyperLogLog(12).merge(whole).registers, whole.registers)
+
+    def test_precision_checks(self):
+        for precision in (MIN_PRECISION - 1, MAX_PRECISION + 1):
+            with self.assertRaises(ValueError):
+                HyperLogLog(precision)
+        self.assertEqual(len(HyperLogLog(MIN_PRECISION).registers), 16)
+        with self.assertRaises(ValueError):
+            HyperLogLog(12).merge(HyperLogLog(13))
+
+    def test_known_cardinality_within_bounds(self):
+        for precision, cardinality in ((10, 200), (10, 50000), (14, 100000)):
+            with self.subTest(precision=precision, cardinality=cardinality):
+                sketch = HyperLogLog(precision)
+                sketch.update(numbers(0, cardinality))
+                sketch.update(numbers(0, cardinality // 2))  # Repeats do not count
+                low, high = sketch.bounds()
+                self.assertLessEqual(low, sketch.count())
+                self.assertLessEqual(sketch.count(), high)
+                self.assertTrue(low <= cardinality <= high, (low, cardinality, high))
+                wide_low, wide_high = sketch.bounds(sigmas=3)
+                self.assertTrue(wide_low <= low and high <= wide_high)
+        self.assertEqual(HyperLogLog().count(), 0)
+        self.assertEqual(HyperLogLog().bounds(), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
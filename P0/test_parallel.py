@@ -0,0 +1,54 @@
+"""
+Tests for parallel ingestion, checked against the serial query.run.
+"""
+import os
+import tempfile
+import unittest
+
+import parallel
+import query
+from generate import generate
+
+EVERYTHING = (0, 1 << 40)
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'calls.csv')
+
+    def write(self, content):
+        with open(self.path, 'wb') as f:
+            f.write(content)
+
+    def test_matches_serial_run(self):
+        generate(self.directory, 2000, texts=1000, numbers=200, seed=3)
+        texts_path = os.path.join(self.directory, 'texts.csv')
+        result = parallel.ingest([texts_path, self.path], workers=1)
+        distinct, talk_time, codes = query.run(texts_path, self.path,
+                                               [query.DistinctNumbers(), query.TalkTime(), query.BangaloreCodes()])
+        self.assertEqual(result.numbers, distinct.numbers)
+        self.assertEqual(result.talk_time, talk_time.talk_time)
+        self.assertEqual(result.codes, codes.codes)
+
+    def test_fields_parsed_as_csv_reader(self):
+        self.write(b'1401,"(080)20\x0c01",01-09-2016 06:00:00,10\r\n1402,"(080)2002\x1e",01-09-2016 06:00:00,20\n')
+        partial = parallel.aggregate_range(self.path, 0, os.path.getsize(self.path), EVERYTHING)
+        self.assertEqual(partial.rows, 2)
+        self.assertEqual(partial.numbers, {'1401', '(080)20\x0c01', '1402', '(080)2002\x1e'})
+
+    def test_boundary_inside_quoted_field_raises(self):
+        self.write(b'1401,"(080)\n2001",01-09-2016 06:00:00,10\n')
+        boundary = 12  # Just past the quoted newline, where split_ranges could cut
+        with self.assertRaises(ValueError):
+            parallel.aggregate_range(self.path, 0, boundary, EVERYTHING)
+        with self.assertRaises(ValueError):
+            parallel.aggregate_range(self.path, boundary, os.path.getsize(self.path), EVERYTHING)
+        whole = parallel.aggregate_range(self.path, 0, os.path.getsize(self.path), EVERYTHING)
+        self.assertIn('(080)\n2001', whole.numbers)
+
+
+if __name__ == '__main__':
+    unittest.main()
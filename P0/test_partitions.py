@@ -0,0 +1,69 @@
+"""
+Tests for the month partitioned calls layout, checked against talktime over the whole loaded file.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import partitions
+import talktime
+from generate import generate
+from records import load, month_bounds
+
+
+def ranked(leaders):
+    # Ties may come out in either order, as the two paths number the phone numbers differently
+    return sorted(leaders, key=lambda item: (-item[1], item[0]))
+
+
+class TestPartitions(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        generate(directory.name, 3000, texts=10, numbers=150, months=4, seed=9)
+        self.calls_path = os.path.join(directory.name, 'calls.csv')
+        self.out_dir = os.path.join(directory.name, partitions.PARTITIONS_DIR)
+
+    def test_top_talkers_across_segments_match_full_load(self):
+        months = partitions.build(self.calls_path, self.out_dir)
+        self.assertEqual(sorted(months), [(2016, 9), (2016, 10), (2016, 11), (2016, 12)])
+        self.assertEqual(sum(months.values()), 3000)
+        calls = load(os.devnull, self.calls_path, cache=False).calls
+        ranges = [(None, None),
+                  (month_bounds(2016, 10)[0], month_bounds(2016, 12)[0]),  # Two whole segments
+                  (month_bounds(2016, 9)[0] + 86400 * 20, month_bounds(2016, 11)[0] + 86400 * 5)]  # Partial ends
+        for start, end in ranges:
+            with self.subTest(start=start, end=end):
+                expected = ranked(talktime.top_talkers(calls, 200, start, end))
+                self.assertEqual(ranked(partitions.top_talkers(200, start, end, self.out_dir)), expected)
+                self.assertEqual(partitions.top_talkers(1, start, end, self.out_dir)[0][1], expected[0][1])
+        self.assertEqual(len(partitions.load_segments(self.out_dir, *ranges[1])), 2)
+        self.assertEqual(partitions.top_talkers(5, 0, 1, self.out_dir), [])
+
+    def test_changed_calls_is_not_fresh(self):
+        self.assertFalse(partitions.is_fresh(self.calls_path, self.out_dir))
+        partitions.build(self.calls_path, self.out_dir)
+        self.assertTrue(partitions.is_fresh(self.calls_path, self.out_dir))
+        stat = os.stat(self.calls_path)
+        os.utime(self.calls_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertFalse(partitions.is_fresh(self.calls_path, self.out_dir))
+        partitions.build(self.calls_path, self.out_dir)
+        with open(self.calls_path, 'a') as f:
+            f.write('1401,(080)2001,01-09-2016 06:00:00,10\n')
+        self.assertFalse(partitions.is_fresh(self.calls_path, self.out_dir))
+
+    def test_interrupted_build_is_not_fresh(self):
+        partitions.build(self.calls_path, self.out_dir)
+        with mock.patch.object(partitions, 'segment_name', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                partitions.build(self.calls_path, self.out_dir)
+        # The old manifest still matches calls.csv, but must not vouch for the half written segments
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, partitions.MANIFEST_NAME)))
+        self.assertFalse(partitions.is_fresh(self.calls_path, self.out_dir))
+        partitions.build(self.calls_path, self.out_dir)
+        self.assertTrue(partitions.is_fresh(self.calls_path, self.out_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests for the shared loader: the binary column cache and the single record readers.
+"""
+import csv
+import os
+import tempfile
+import unittest
+
+import records
+from generate import generate
+
+
+def all_records(data):
+    return ([data.texts.record(index) for index in range(len(data.texts))],
+            [data.calls.record(index) for index in range(len(data.calls))])
+
+
+class TestRecordsCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        generate(directory.name, 1500, texts=1000, numbers=200, seed=11)
+        self.texts_path = os.path.join(directory.name, 'texts.csv')
+        self.calls_path = os.path.join(directory.name, 'calls.csv')
+        self.cache_path = os.path.join(directory.name, records.CACHE_NAME)
+
+    def load(self, **kwargs):
+        return records.load(self.texts_path, self.calls_path, **kwargs)
+
+    def test_cache_decodes_to_csv_records(self):
+        expected = all_records(self.load(cache=False))
+        self.assertFalse(os.path.exists(self.cache_path))
+        first = self.load()
+        self.assertEqual(first.source, 'csv')
+        self.assertTrue(os.path.exists(self.cache_path))
+        cached = self.load()
+        self.assertEqual(cached.source, 'cache')
+        self.assertEqual(all_records(cached), expected)
+        self.assertEqual(len(cached.numbers), len(first.numbers))
+
+    def test_changed_source_rewrites_cache(self):
+        self.load()
+        for path, change in ((self.texts_path, 'mtime'), (self.calls_path, 'mtime'),
+                             (self.texts_path, 'size'), (self.calls_path, 'size')):
+            with self.subTest(path=os.path.basename(path), change=change):
+                if change == 'mtime':
+                    stat = os.stat(path)
+                    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+                else:
+                    with open(path, 'a') as f:
+                        f.write(records.first_record(path)[0] + ',(080)2001,01-09-2016 06:00:00' +
+                                (',5\n' if path == self.calls_path else '\n'))
+                stamp = records._source_stamp(self.texts_path, self.calls_path)
+                self.assertIsNone(records.read_cache(self.cache_path, stamp))  # Stale
+                data = self.load()
+                self.assertEqual(data.source, 'csv')
+                rewritten = records.read_cache(self.cache_path, stamp)
+                self.assertIsNotNone(rewritten)
+                self.assertEqual(all_records(rewritten), all_records(self.load(cache=False)))
+                self.assertEqual(self.load().source, 'cache')
+
+    def test_damaged_cache_falls_back_to_csv(self):
+        expected = all_records(self.load())
+        with open(self.cache_path, 'rb') as f:
+            content = f.read()
+        damaged = {
+            'empty': b'',
+            'truncated header': content[:records.CACHE_HEADER.size - 1],
+            'truncated columns': content[:len(content) // 2],
+            'bad magic': b'X' + content[1:],
+        }
+        for name, corrupt in damaged.items():
+            with self.subTest(name=name):
+                with open(self.cache_path, 'wb') as f:
+                    f.write(corrupt)
+                data = self.load()
+                self.assertEqual(data.source, 'csv')
+                self.assertEqual(all_records(data), expected)
+                self.assertEqual(self.load().source, 'cache')  # Rewritten by the fallback
+
+
+class TestFirstLastRecord(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'calls.csv')
+
+    def write(self, content):
+        with open(self.path, 'wb') as f:
+            f.write(content)
+
+    def assertLastRecord(self, expected):
+        # Block sizes down to one byte, so records straddle block boundaries
+        for block_size in (1, 2, 3, 7, records.TAIL_BLOCK_BYTES):
+            with self.subTest(block_size=block_size):
+                self.assertEqual(records.last_record(self.path, block_size=block_size), expected)
+
+    def test_quoted_newline_in_last_record(self):
+        self.write(b'1401,(080)2001,01-09-2016 06:00:00,10\n'
+                   b'1402,"(080)\n2002\n",01-09-2016 06:00:00,"2\n0"\n')
+        self.assertLastRecord(['1402', '(080)\n2002\n', '01-09-2016 06:00:00', '2\n0'])
+
+    def test_escaped_quotes_in_last_record(self):
+        self.write(b'1401,(080)2001,01-09-2016 06:00:00,10\n1402,"say ""hi""\n",x,20\n')
+        self.assertLastRecord(['1402', 'say "hi"\n', 'x', '20'])
+
+    def test_trailing_newlines(self):
+        for ending in (b'\n\n\n', b'\r\n\r\n', b'\r\n\n\r\n', b''):
+            with self.subTest(ending=ending):
+                self.write(b'1401,(080)2001,01-09-2016 06:00:00,10\r\n'
+                           b'1402,(080)2002,01-09-2016 07:00:00,20' + ending)
+                self.assertLastRecord(['1402', '(080)2002', '01-09-2016 07:00:00', '20'])
+
+    def test_single_record(self):
+        self.write(b'1401,"(080)\n2001",01-09-2016 06:00:00,10\n\n')
+        self.assertLastRecord(['1401', '(080)\n2001', '01-09-2016 06:00:00', '10'])
+        self.assertEqual(records.first_record(self.path), ['1401', '(080)\n2001', '01-09-2016 06:00:00', '10'])
+
+    def test_empty_file(self):
+        for content in (b'', b'\n', b'\r\n\r\n'):
+            with self.subTest(content=content):
+                self.write(content)
+                self.assertLastRecord(None)
+        self.write(b'')
+        self.assertIsNone(records.first_record(self.path))
+
+    def test_matches_full_parse(self):
+        directory = os.path.dirname(self.path)
+        generate(directory, 300, texts=200, numbers=50, seed=5)
+        for name in ('texts.csv', 'calls.csv'):
+            path = os.path.join(directory, name)
+            with open(path, 'r', newline='') as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(records.first_record(path), rows[0])
+            self.assertEqual(records.last_record(path, block_size=1), rows[-1])
+            self.assertEqual(records.last_record(path), rows[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
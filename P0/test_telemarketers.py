@@ -0,0 +1,124 @@
+"""
+Tests for the incremental telemarketer detector, checked against a full query.run.
+"""
+import csv
+import os
+import tempfile
+import unittest
+
+import query
+from generate import generate
+from telemarketers import TelemarketerDetector, read_new_rows
+
+
+def full_run_suspects(texts_path, calls_path):
+    telemarketers = query.Telemarketers()
+    query.run(texts_path, calls_path, [telemarketers])
+    return telemarketers.candidates()
+
+
+class TestTelemarketerDetector(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        source = os.path.join(self.directory, 'source')
+        generate(source, 3000, texts=2000, numbers=300, seed=7)
+        with open(os.path.join(source, 'texts.csv'), 'rb') as f:
+            self.text_lines = f.read().splitlines(keepends=True)
+        with open(os.path.join(source, 'calls.csv'), 'rb') as f:
+            self.call_lines = f.read().splitlines(keepends=True)
+        self.texts_path = os.path.join(self.directory, 'texts.csv')
+        self.calls_path = os.path.join(self.directory, 'calls.csv')
+        self.state_path = os.path.join(self.directory, 'telemarketers.json')
+        self.write(self.texts_path, [], 'wb')
+        self.write(self.calls_path, [], 'wb')
+
+    def write(self, path, lines, mode='ab'):
+        with open(path, mode) as f:
+            f.write(b''.join(lines))
+
+    def append_batch(self, start, end):
+        self.write(self.texts_path, self.text_lines[start * 2 // 3:end * 2 // 3])
+        self.write(self.calls_path, self.call_lines[start:end])
+
+    def test_batches_match_full_run(self):
+        detector = TelemarketerDetector(self.texts_path, self.calls_path)
+        for start in range(0, 3000, 700):
+            self.append_batch(start, start + 700)
+            detector.ingest()
+            self.assertEqual(detector.candidates(), full_run_suspects(self.texts_path, self.calls_path))
+        self.assertTrue(detector.candidates())
+        self.assertEqual(detector.ingest(), (0, 0))
+
+    def test_save_and_load_resume(self):
+        detector = TelemarketerDetector(self.texts_path, self.calls_path)
+        self.append_batch(0, 1500)
+        detector.ingest()
+        detector.save(self.state_path)
+
+        restored = TelemarketerDetector.load(self.state_path, self.texts_path, self.calls_path)
+        self.assertEqual(restored.offsets, detector.offsets)
+        self.assertEqual(restored.candidates(), detector.candidates())
+        self.append_batch(1500, 3000)
+        self.assertEqual(restored.ingest(), (1000, 1500))  # Only the rows appended since the save
+        self.assertEqual(restored.candidates(), full_run_suspects(self.texts_path, self.calls_path))
+
+        # State saved for other files is ignored
+        other = TelemarketerDetector.load(self.state_path, self.texts_path, self.texts_path)
+        self.assertEqual(other.offsets, {'texts': 0, 'calls': 0})
+        self.assertEqual(other.candidates(), set())
+
+    def test_partial_row_waits_for_newline(self):
+        line = self.call_lines[0]
+        self.write(self.calls_path, [line, line[:10]])
+        self.assertEqual(list(read_new_rows(self.calls_path, 0)),
+                         [(line.decode().rstrip('\r\n').split(','), len(line))])
+
+        detector = TelemarketerDetector(self.texts_path, self.calls_path)
+        self.assertEqual(detector.ingest(), (0, 1))
+        self.assertEqual(detector.offsets['calls'], len(line))  # Resumes at the last newline
+        self.write(self.calls_path, [line[10:]])
+        self.assertEqual(detector.ingest(), (0, 1))
+        self.assertEqual(detector.offsets['calls'], 2 * len(line))
+
+    def test_rows_match_csv_reader(self):
+        complete = (b'1401,"(080)20\x0c01",01-09-2016 06:00:00,10\n'
+                    b'1402,"(080)2002\n",01-09-2016 06:10:00,20\r\n')
+        # The last newline is inside the quoted field of a row still being written
+        self.write(self.calls_path, [complete, b'1403,"(080)2003\n'])
+        with open(self.calls_path, 'r', newline='') as f:
+            expected = list(csv.reader(f))[:2]
+        self.assertEqual(list(read_new_rows(self.calls_path, 0)),
+                         [(expected[0], complete.index(b'\n') + 1), (expected[1], len(complete))])
+        self.assertEqual(expected[0][1], '(080)20\x0c01')
+        self.assertEqual(expected[1][1], '(080)2002\n')
+
+        self.write(self.calls_path, [b'",01-09-2016 06:20:00,30\n'])
+        self.assertEqual(list(read_new_rows(self.calls_path, len(complete))),
+                         [(['1403', '(080)2003\n', '01-09-2016 06:20:00', '30'], os.path.getsize(self.calls_path))])
+        self.assertEqual(list(read_new_rows(self.calls_path, os.path.getsize(self.calls_path))), [])
+
+    def test_suspect_demoted_immediately(self):
+        self.write(self.calls_path, [b'1400000001,(080)2000000,01-09-2016 06:00:00,10\n'])
+        detector = TelemarketerDetector(self.texts_path, self.calls_path)
+        detector.ingest()
+        self.assertEqual(detector.candidates(), {'1400000001'})
+        self.write(self.texts_path, [b'1400000001,(080)2000000,01-09-2016 07:00:00\n'])
+        detector.ingest()
+        self.assertEqual(detector.candidates(), set())
+
+    def test_shrunk_file_rebuilds(self):
+        detector = TelemarketerDetector(self.texts_path, self.calls_path)
+        self.append_batch(0, 3000)
+        detector.ingest()
+        # Replaced by a shorter file: the state must come from the new contents only
+        self.write(self.texts_path, self.text_lines[:100], 'wb')
+        self.write(self.calls_path, self.call_lines[:500], 'wb')
+        detector.ingest()
+        self.assertEqual(detector.offsets['calls'], os.path.getsize(self.calls_path))
+        self.assertEqual(detector.candidates(), full_run_suspects(self.texts_path, self.calls_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
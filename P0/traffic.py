@@ -0,0 +1,153 @@
+"""
+Origin code x destination code traffic matrix over calls (Task3).
+
+Every number is classified once (codes.classify_table) and its code is
+dictionary-encoded, so each call maps to one matrix cell,
+origin_id * n_codes + destination_id, where the call count and total seconds
+are accumulated in a single pass. Numbers matching no known format share the
+UNKNOWN_CODE row/column so row totals still count every call.
+
+The matrix is dense (flat int64 arrays) while it has at most DENSE_CELLS
+cells and sparse (dict of cell -> total) beyond that.
+
+Task3's answers are slices of the matrix: the codes called from Bangalore are
+the non empty cells of row (080), and the percentage is cell (080, 080) over
+the row total.
+
+Usage:
+    python traffic.py [--top N] [--by seconds|calls]
+"""
+import argparse
+import array
+
+import profiling
+from codes import classify_table
+from records import NumberTable, load
+
+UNKNOWN_CODE = '?'
+DENSE_CELLS = 1 << 20
+
+
+class TrafficMatrix(object):
+    """
+    Description: Call counts and total seconds per (origin code, destination code)
+    """
+    def __init__(self, codes):
+        self.codes = codes  # NumberTable of code labels
+        self.size = len(codes)
+        cells = self.size * self.size
+        if cells <= DENSE_CELLS:
+            self.counts = array.array('q', bytes(8 * cells))
+            self.seconds = array.array('q', bytes(8 * cells))
+        else:
+            self.counts = dict()
+            self.seconds = dict()
+
+    @property
+    def is_dense(self):
+        return isinstance(self.counts, array.array)
+
+    def _get(self, column, cell):
+        if self.is_dense:
+            return column[cell]
+        return column.get(cell, 0)
+
+    def cell(self, origin, destination):
+        """
+        Arguments:
+            origin(str), destination(str): codes
+
+        Returns:
+            (calls, seconds) from origin to destination
+        """
+        origin_id, destination_id = self.codes.ids.get(origin), self.codes.ids.get(destination)
+        if origin_id is None or destination_id is None:
+            return 0, 0
+        cell = origin_id * self.size + destination_id
+        return self._get(self.counts, cell), self._get(self.seconds, cell)
+
+    def row(self, origin):
+        """
+        Arguments:
+            origin(str): code
+
+        Returns:
+            dict of destination code -> (calls, seconds) for every destination called from origin
+        """
+        origin_id = self.codes.ids.get(origin)
+        if origin_id is None:
+            return dict()
+        base = origin_id * self.size
+        result = dict()
+        for destination_id in range(self.size):
+            calls = self._get(self.counts, base + destination_id)
+            if calls:
+                result[self.codes.decode(destination_id)] = (calls, self._get(self.seconds, base + destination_id))
+        return result
+
+    def row_total(self, origin):
+        """
+        Returns:
+            (calls, seconds) from origin to any destination
+        """
+        row = self.row(origin).values()
+        return sum(calls for calls, seconds in row), sum(seconds for calls, seconds in row)
+
+    def cells(self):
+        """
+        Returns:
+            generator of (origin, destination, calls, seconds) for every non empty cell
+        """
+        if self.is_dense:
+            occupied = (cell for cell, calls in enumerate(self.counts) if calls)
+        else:
+            occupied = iter(self.counts)
+        for cell in occupied:
+            origin_id, destination_id = divmod(cell, self.size)
+            yield (self.codes.decode(origin_id), self.codes.decode(destination_id),
+                   self._get(self.counts, cell), self._get(self.seconds, cell))
+
+
+def build(calls):
+    """
+    Description: Aggregate calls into a TrafficMatrix in one pass
+
+    Arguments:
+        calls(Records): columnar calls from records.load
+
+    Returns:
+        TrafficMatrix
+    """
+    codes = NumberTable()
+    codes.encode(UNKNOWN_CODE)
+    code_ids = [codes.encode(code if code is not None else UNKNOWN_CODE)
+                for kind, code in classify_table(calls.numbers)]
+    matrix = TrafficMatrix(codes)
+    size, counts, seconds = matrix.size, matrix.counts, matrix.seconds
+    with profiling.stage('aggregate') as stage:
+        if matrix.is_dense:
+            for incoming_id, answering_id, during in zip(calls.incoming, calls.answering, calls.durations):
+                cell = code_ids[incoming_id] * size + code_ids[answering_id]
+                counts[cell] += 1
+                seconds[cell] += during
+        else:
+            for incoming_id, answering_id, during in zip(calls.incoming, calls.answering, calls.durations):
+                cell = code_ids[incoming_id] * size + code_ids[answering_id]
+                counts[cell] = counts.get(cell, 0) + 1
+                seconds[cell] = seconds.get(cell, 0) + during
+        stage.rows = len(calls)
+    return matrix
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Origin x destination code traffic matrix')
+    parser.add_argument('--top', type=int, default=None, help='only print the N busiest cells')
+    parser.add_argument('--by', choices=('calls', 'seconds'), default='calls')
+    args = parser.parse_args()
+
+    matrix = build(load().calls)
+    cells = list(matrix.cells())
+    cells.sort(key=lambda cell: cell[2] if args.by == 'calls' else cell[3], reverse=True)
+    print("origin,destination,calls,seconds")
+    for origin, destination, calls, seconds in cells[:args.top]:
+        print("{},{},{},{}".format(origin, destination, calls, seconds))
@@ -0,0 +1,354 @@
+"""
+Pluggable eviction for a cache with the get/set API of LRU_Cache.
+
+PolicyCache stores the values and hands every eviction decision to an EvictionPolicy
+strategy object: LRUPolicy, LFUPolicy, TwoQPolicy, ARCPolicy or WTinyLFUPolicy, the last
+with a CountMinSketch admission filter. E.g. PolicyCache(100, ARCPolicy).
+"""
+from array import array
+from collections import OrderedDict
+
+
+class EvictionPolicy(object):
+    """
+    Description: Strategy deciding which keys a PolicyCache keeps. The cache stores the values and
+    tells the policy about every hit and every new key; the policy keeps its own bookkeeping and
+    answers with the keys to evict.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+
+    def on_hit(self, key):
+        """
+        Description: key, already in the cache, was read or updated
+        """
+        raise NotImplementedError
+
+    def on_insert(self, key):
+        """
+        Description: key, not in the cache, is being added
+        Arguments:
+            Key
+
+        Returns:
+            List of keys to evict. It may contain key itself if the policy declines to admit it.
+        """
+        raise NotImplementedError
+
+
+class LRUPolicy(EvictionPolicy):
+    """
+    Description: Least recently used, as in LRU_Cache
+    """
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.order = OrderedDict()  # Least recent first
+
+    def on_hit(self, key):
+        self.order.move_to_end(key)
+
+    def on_insert(self, key):
+        evicted = []
+        if len(self.order) >= self.capacity:
+            evicted.append(self.order.popitem(last=False)[0])
+        self.order[key] = None
+        return evicted
+
+
+class LFUPolicy(EvictionPolicy):
+    """
+    Description: Least frequently used, ties broken by least recently used. Keys are bucketed by
+    use count so that hits and evictions are O(1).
+    """
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.counts = dict()  # key -> use count
+        self.buckets = dict()  # use count -> OrderedDict of keys, least recent first
+        self.min_count = 0
+
+    def on_hit(self, key):
+        count = self.counts[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+        self.counts[key] = count + 1
+        self.buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def on_insert(self, key):
+        evicted = []
+        if len(self.counts) >= self.capacity:
+            bucket = self.buckets[self.min_count]
+            victim = bucket.popitem(last=False)[0]
+            if not bucket:
+                del self.buckets[self.min_count]
+            del self.counts[victim]
+            evicted.append(victim)
+        self.counts[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_count = 1
+        return evicted
+
+
+class TwoQPolicy(EvictionPolicy):
+    """
+    Description: 2Q (Johnson and Shasha). New keys enter a small FIFO (a1_in). Keys evicted from it
+    are remembered, without values, in a ghost FIFO (a1_out), and only a key seen again while still
+    remembered there is admitted to the main LRU (am). A scan passes through a1_in and never
+    reaches am.
+    """
+    def __init__(self, capacity, in_share=0.25, out_share=0.5):
+        super().__init__(capacity)
+        self.in_capacity = max(1, int(capacity * in_share))
+        self.out_capacity = max(1, int(capacity * out_share))
+        self.a1_in = OrderedDict()  # Oldest first
+        self.a1_out = OrderedDict()  # Ghost keys, oldest first
+        self.am = OrderedDict()  # Least recent first
+
+    def on_hit(self, key):
+        # A hit in a1_in is treated as correlated with the first use and not promoted
+        if key in self.am:
+            self.am.move_to_end(key)
+
+    def _reclaim(self):
+        if len(self.a1_in) + len(self.am) < self.capacity:
+            return []
+        if len(self.a1_in) > self.in_capacity or not self.am:
+            victim = self.a1_in.popitem(last=False)[0]
+            self.a1_out[victim] = None
+            if len(self.a1_out) > self.out_capacity:
+                self.a1_out.popitem(last=False)
+        else:
+            victim = self.am.popitem(last=False)[0]
+        return [victim]
+
+    def on_insert(self, key):
+        evicted = self._reclaim()
+        if key in self.a1_out:
+            del self.a1_out[key]
+            self.am[key] = None
+        else:
+            self.a1_in[key] = None
+        return evicted
+
+
+class ARCPolicy(EvictionPolicy):
+    """
+    Description: Adaptive Replacement Cache (Megiddo and Modha). Resident keys are split between t1,
+    seen once recently, and t2, seen at least twice. Ghost lists b1 and b2 remember keys recently
+    evicted from each, and a hit on a ghost moves the target size p of t1 towards the list that
+    would have kept it.
+    """
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.p = 0  # Target size of t1
+        self.t1 = OrderedDict()  # Least recent first, in every list
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+
+    def on_hit(self, key):
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def _replace(self, key):
+        """
+        Description: Evict the least recent key of t1 or t2 into its ghost list
+        """
+        if len(self.t1) + len(self.t2) < self.capacity:
+            return []
+        if self.t1 and (len(self.t1) > self.p or (key in self.b2 and len(self.t1) == self.p)):
+            victim = self.t1.popitem(last=False)[0]
+            self.b1[victim] = None
+        else:
+            victim = self.t2.popitem(last=False)[0]
+            self.b2[victim] = None
+        return [victim]
+
+    def on_insert(self, key):
+        capacity = self.capacity
+        if key in self.b1:
+            self.p = min(capacity, self.p + max(len(self.b2) // len(self.b1), 1))
+            evicted = self._replace(key)
+            del self.b1[key]
+            self.t2[key] = None
+            return evicted
+        if key in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) // len(self.b2), 1))
+            evicted = self._replace(key)
+            del self.b2[key]
+            self.t2[key] = None
+            return evicted
+        evicted = []
+        if len(self.t1) + len(self.b1) == capacity:
+            if len(self.t1) < capacity:
+                self.b1.popitem(last=False)
+                evicted = self._replace(key)
+            else:
+                evicted = [self.t1.popitem(last=False)[0]]
+        elif len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) >= capacity:
+            if len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) == 2 * capacity:
+                self.b2.popitem(last=False)
+            evicted = self._replace(key)
+        self.t1[key] = None
+        return evicted
+
+
+class CountMinSketch(object):
+    """
+    Description: Approximate use counts in depth rows of width small counters. A key's estimate is
+    the smallest of its counters, one per row, so it can only be too high. Counters saturate at 15
+    and are all halved every sample_size increments, so old popularity fades.
+    """
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MAX_COUNT = 15
+    HALVE = bytes(count >> 1 for count in range(256))  # Translation table halving every counter byte
+
+    def __init__(self, width, sample_size):
+        self.bits = max(4, (width - 1).bit_length())  # Width rounded up to a power of two
+        self.width = 1 << self.bits
+        self.depth = len(self.SEEDS)
+        self.table = array('B', bytes(self.width * self.depth))
+        self.sample_size = sample_size
+        self.additions = 0
+
+    def _cells(self, key):
+        # One multiplicative hash per row, unrolled as this runs on every cache access
+        hashed = hash(key)
+        shift, width = 64 - self.bits, self.width
+        seed0, seed1, seed2, seed3 = self.SEEDS
+        return (((hashed * seed0) & 0xFFFFFFFFFFFFFFFF) >> shift,
+                width + (((hashed * seed1) & 0xFFFFFFFFFFFFFFFF) >> shift),
+                2 * width + (((hashed * seed2) & 0xFFFFFFFFFFFFFFFF) >> shift),
+                3 * width + (((hashed * seed3) & 0xFFFFFFFFFFFFFFFF) >> shift))
+
+    def increment(self, key):
+        table, limit = self.table, self.MAX_COUNT
+        for cell in self._cells(key):
+            if table[cell] < limit:
+                table[cell] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = array('B', table.tobytes().translate(self.HALVE))
+            self.additions //= 2
+
+    def estimate(self, key):
+        table = self.table
+        cell0, cell1, cell2, cell3 = self._cells(key)
+        return min(table[cell0], table[cell1], table[cell2], table[cell3])
+
+
+class WTinyLFUPolicy(EvictionPolicy):
+    """
+    Description: W-TinyLFU (Einziger, Friedman and Manes). New keys enter a small LRU window. A key
+    leaving the window is admitted to the main cache only if the count-min sketch estimates it is
+    used more often than the main cache's next victim, so one-off keys from a scan are turned away.
+    The main cache is a segmented LRU: keys hit while on probation move to the protected segment.
+    """
+    def __init__(self, capacity, window_share=0.01, protected_share=0.8):
+        super().__init__(capacity)
+        self.window_capacity = max(1, int(capacity * window_share))
+        self.main_capacity = max(0, capacity - self.window_capacity)
+        self.protected_capacity = int(self.main_capacity * protected_share)
+        self.window = OrderedDict()  # Least recent first, in every segment
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.sketch = CountMinSketch(4 * max(capacity, 16), sample_size=10 * max(capacity, 16))
+
+    def on_hit(self, key):
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            if len(self.protected) > self.protected_capacity:
+                demoted = self.protected.popitem(last=False)[0]
+                self.probation[demoted] = None
+        else:
+            self.protected.move_to_end(key)
+
+    def on_insert(self, key):
+        self.sketch.increment(key)
+        self.window[key] = None
+        if len(self.window) <= self.window_capacity:
+            return []
+        candidate = self.window.popitem(last=False)[0]
+        if len(self.probation) + len(self.protected) < self.main_capacity:
+            self.probation[candidate] = None
+            return []
+        if not self.main_capacity:
+            return [candidate]
+        victims = self.probation if self.probation else self.protected
+        victim = next(iter(victims))
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del victims[victim]
+            self.probation[candidate] = None
+            return [victim]
+        return [candidate]
+
+
+class PolicyCache(object):
+    """
+    Description: Cache with the same get/set API as LRU_Cache whose eviction is decided by a pluggable
+    EvictionPolicy, e.g. PolicyCache(100, ARCPolicy). Hits and misses are counted so that policies can
+    be compared on a workload.
+    """
+    def __init__(self, capacity, policy=LRUPolicy):
+        if capacity < 0:
+            print("Cannot use negative capacity for LRU. Defaulting to empty cache")
+            capacity = 0
+        self.capacity = capacity
+        self.policy = policy(capacity)  # Policy class, or any callable taking the capacity
+        self.key_map = dict()  # key -> value
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Description: Retrieve item from provided key. Return -1 if nonexistent.
+        Arguments:
+            Key
+
+        Returns:
+            Value
+        """
+        if key not in self.key_map:
+            self.misses += 1
+            return -1
+        self.hits += 1
+        self.policy.on_hit(key)
+        return self.key_map[key]
+
+    def set(self, key, value):
+        """
+        Description: Set the value of key, evicting whichever keys the policy chooses
+        Arguments:
+            Key, Value
+
+        Returns:
+            None
+        """
+        if key in self.key_map:
+            self.key_map[key] = value
+            self.policy.on_hit(key)
+            return
+        if self.capacity == 0:
+            return
+        self.key_map[key] = value
+        for evicted in self.policy.on_insert(key):
+            del self.key_map[evicted]
+            self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return "{}: {}".format(type(self.policy).__name__, self.key_map)
@@ -0,0 +1,252 @@
+"""
+Caches that load missing values themselves, on top of the LRU caches.
+
+    memoize             decorator caching a function's results in an LRU_Cache, with live stats
+    AsyncLoadingCache   asyncio cache whose concurrent misses for a key share one load
+"""
+import asyncio
+import functools
+import time
+
+from lru_caches import MISSING, DLLQueue, ExpiringLRU_Cache, LRU_Cache
+
+KWARGS_MARK = object()  # Separates positional from keyword arguments in memoize keys
+
+
+class MemoStats(object):
+    """
+    Description: Live counters of a memoized function. load_seconds is the time spent computing misses.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Description: Zero every counter in place, so references held to these stats stay live
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def __str__(self):
+        return "hits={} misses={} evictions={} load_seconds={:.6f}".format(
+            self.hits, self.misses, self.evictions, self.load_seconds)
+
+
+def make_key(args, kwargs, typed=False):
+    """
+    Description: Hashable cache key for a call. With typed, arguments that compare equal but differ
+    in type, such as 1, 1.0 and True, get different keys.
+    Arguments:
+        Positional arguments tuple, keyword arguments dict, typed flag
+
+    Returns:
+        Tuple key
+    """
+    key = args
+    if kwargs:
+        key += (KWARGS_MARK,) + tuple(kwargs.items())
+    if typed:
+        key += tuple(type(value) for value in args)
+        if kwargs:
+            key += tuple(type(value) for value in kwargs.values())
+    return key
+
+
+def memoize(capacity=128, typed=False):
+    """
+    Description: Decorator caching a function's results in an LRU_Cache of the given capacity. The
+    wrapper exposes the cache as .cache, live MemoStats as .stats, and .cache_clear(). Arguments must
+    be hashable. Exceptions are not cached.
+    Arguments:
+        Capacity, typed flag (see make_key)
+
+    Returns:
+        Decorator
+    """
+    def decorator(function):
+        cache = LRU_Cache(capacity)
+        stats = MemoStats()
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs, typed)
+            if key in cache.key_map:
+                stats.hits += 1
+                return cache.get(key)
+            stats.misses += 1
+            start = time.perf_counter()
+            try:
+                value = function(*args, **kwargs)
+            finally:
+                stats.load_seconds += time.perf_counter() - start
+            if cache.capacity and cache.is_full() and key not in cache.key_map:
+                stats.evictions += 1
+            cache.set(key, value)
+            return value
+
+        def cache_clear():
+            # Emptied in place, as functools.lru_cache does, so .cache and .stats stay the same objects
+            cache.key_map = dict()
+            cache.usage_queue = DLLQueue()
+            cache.num_elements = 0
+            stats.reset()
+
+        wrapper.cache = cache
+        wrapper.stats = stats
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+def _retrieve_exception(future):
+    # Mark a failed load's exception as seen, so an unawaited refresh does not warn at shutdown
+    if not future.cancelled():
+        future.exception()
+
+
+class AsyncLoadingCache(object):
+    """
+    Description: asyncio cache front-end that loads missing values itself. Concurrent misses for a
+    key share one in-flight load, so a hot key that expires is loaded once rather than once per
+    waiting coroutine. Values live in an ExpiringLRU_Cache, with an optional ttl.
+
+    With refresh_after, a value older than that many seconds is still returned at once, while
+    one background load replaces it (stale-while-revalidate).
+
+    loader is an async function key -> value. batch_loader, if given, is an async function
+    list of keys -> dict of key -> value used by get_many; it can also stand in for loader.
+    """
+    def __init__(self, capacity, loader=None, batch_loader=None, ttl=None, refresh_after=None,
+                 clock=time.monotonic):
+        if loader is None and batch_loader is None:
+            raise ValueError("AsyncLoadingCache needs a loader or a batch_loader")
+        self.store = ExpiringLRU_Cache(capacity, ttl=ttl, clock=clock)  # key -> (value, loaded at)
+        self.loader = loader
+        self.batch_loader = batch_loader
+        self.refresh_after = refresh_after
+        self.clock = clock
+        self.in_flight = dict()  # key -> future of the running load
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # Misses that joined a load already in flight
+        self.refreshes = 0
+
+    def _cached(self, key):
+        """
+        Description: Cached value of key or MISSING, starting a background refresh if it is stale
+        """
+        entry = self.store.get(key, MISSING)
+        if entry is MISSING:
+            return MISSING
+        value, loaded_at = entry
+        if (self.refresh_after is not None and key not in self.in_flight and
+                self.clock() - loaded_at >= self.refresh_after):
+            self.refreshes += 1
+            self._start_load(key)
+        return value
+
+    def _store(self, key, value):
+        self.store.set(key, (value, self.clock()))
+
+    async def _load(self, key):
+        try:
+            if self.loader is not None:
+                value = await self.loader(key)
+            else:
+                value = (await self.batch_loader([key]))[key]
+            self._store(key, value)
+            return value
+        finally:
+            del self.in_flight[key]
+
+    def _start_load(self, key):
+        future = asyncio.ensure_future(self._load(key))
+        future.add_done_callback(_retrieve_exception)
+        self.in_flight[key] = future
+        return future
+
+    async def _load_batch(self, keys, futures):
+        try:
+            values = await self.batch_loader(keys)
+        except BaseException as error:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            raise
+        finally:
+            for key in keys:
+                del self.in_flight[key]
+        for key, future in zip(keys, futures):
+            if key in values:
+                self._store(key, values[key])
+                future.set_result(values[key])
+            else:
+                future.set_exception(KeyError(key))
+
+    async def get(self, key):
+        """
+        Description: Value of key, loading it if missing
+        Arguments:
+            Key
+
+        Returns:
+            Value
+        """
+        value = self._cached(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        future = self.in_flight.get(key)
+        if future is None:
+            future = self._start_load(key)
+        else:
+            self.coalesced += 1
+        # Shielded so that a cancelled caller does not cancel the load other callers wait on
+        return await asyncio.shield(future)
+
+    async def get_many(self, keys):
+        """
+        Description: Values of several keys. Missing keys not already being loaded are loaded together
+        in one batch_loader call, or concurrently through loader if there is no batch_loader.
+        Arguments:
+            Iterable of keys
+
+        Returns:
+            dict of key -> value, in the order of keys
+        """
+        keys = list(dict.fromkeys(keys))
+        results = dict()
+        waiting = dict()
+        to_load = []
+        for key in keys:
+            value = self._cached(key)
+            if value is not MISSING:
+                self.hits += 1
+                results[key] = value
+                continue
+            self.misses += 1
+            if key in self.in_flight:
+                self.coalesced += 1
+                waiting[key] = self.in_flight[key]
+            else:
+                to_load.append(key)
+        if to_load and self.batch_loader is not None:
+            loop = asyncio.get_running_loop()
+            futures = [loop.create_future() for _ in to_load]
+            for key, future in zip(to_load, futures):
+                future.add_done_callback(_retrieve_exception)
+                self.in_flight[key] = waiting[key] = future
+            asyncio.ensure_future(self._load_batch(to_load, futures)).add_done_callback(_retrieve_exception)
+        else:
+            for key in to_load:
+                waiting[key] = self._start_load(key)
+        for key, future in waiting.items():
+            results[key] = await asyncio.shield(future)
+        return {key: results[key] for key in keys}
@@ -0,0 +1,260 @@
+"""
+Benchmarks for the LRU caches in lru_caches.py and eviction_policies.py.
+
+Usage:
+    python lru_benchmark.py compact [--entries 1000000]
+        ops/sec and bytes per entry of SlotLRU_Cache against LRU_Cache
+    python lru_benchmark.py sharded [--entries 100000] [--threads 1 2 4 8] [--shards 16]
+        multithreaded ops/sec of ShardedLRU_Cache against one globally locked cache
+    python lru_benchmark.py replay [--trace zipf|scan|loop|mixed|PATH] [--length 1000000] [--keys 100000]
+                                   [--capacities 1000 10000 100000] [--caches LRU_Cache ARC ...] [--json out.json]
+        replays a key trace (a get per key, and a set on a miss) against each cache at each capacity and
+        reports hit rate, ops/sec and bytes per entry. A trace file holds one key per line; with
+        comma separated lines the first field is the key.
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+import tracemalloc
+
+from eviction_policies import ARCPolicy, LFUPolicy, LRUPolicy, PolicyCache, TwoQPolicy, WTinyLFUPolicy
+from lru_caches import LRU_Cache, ShardedLRU_Cache, SlotLRU_Cache
+
+
+def bytes_per_entry(cache_class, entries):
+    """
+    Description: Memory traced while building and filling a cache, per entry. Keys and
+    values are allocated beforehand so only the cache's own structures are counted.
+    """
+    keys = list(range(1000, 1000 + entries))
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    cache = cache_class(entries)
+    for key in keys:
+        cache.set(key, key)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return (after - before) / entries
+
+
+def ops_per_second(cache_class, entries, operations, seed=0):
+    """
+    Description: Throughput of a mixed workload: fill to capacity, then random gets and sets
+    over twice the capacity worth of keys so about half the operations miss or evict
+    """
+    rng = random.Random(seed)
+    keys = [rng.randrange(2 * entries) for _ in range(operations)]
+    is_get = [rng.random() < 0.8 for _ in range(operations)]
+    cache = cache_class(entries)
+    for key in range(entries):
+        cache.set(key, key)
+    get, set_ = cache.get, cache.set
+    start = time.perf_counter()
+    for key, getting in zip(keys, is_get):
+        if getting:
+            get(key)
+        else:
+            set_(key, key)
+    return operations / (time.perf_counter() - start)
+
+
+def compact(entries):
+    for cache_class in (LRU_Cache, SlotLRU_Cache):
+        memory = bytes_per_entry(cache_class, entries)
+        throughput = ops_per_second(cache_class, entries, entries)
+        print("{:<14} {:>12,.0f} ops/s {:>8.1f} bytes/entry".format(cache_class.__name__, throughput, memory))
+
+
+def threaded_ops_per_second(cache, threads, operations, key_space, seed=0):
+    """
+    Description: Throughput of threads running random gets (80%) and sets concurrently on one
+    cache. Every thread's workload is generated before the threads start together.
+    """
+    workloads = []
+    for index in range(threads):
+        rng = random.Random(seed + index)
+        workloads.append([(rng.randrange(key_space), rng.random() < 0.8) for _ in range(operations)])
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(workload):
+        get, set_ = cache.get, cache.set
+        barrier.wait()
+        for key, getting in workload:
+            if getting:
+                get(key)
+            else:
+                set_(key, key)
+
+    workers = [threading.Thread(target=worker, args=(workload,)) for workload in workloads]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * operations / (time.perf_counter() - start)
+
+
+def sharded(entries, thread_counts, shards):
+    operations = max(entries // 2, 1000)
+    for threads in thread_counts:
+        for num_shards in (1, shards):
+            cache = ShardedLRU_Cache(entries, num_shards=num_shards)
+            for key in range(entries):
+                cache.set(key, key)
+            throughput = threaded_ops_per_second(cache, threads, operations, 2 * entries)
+            stats = cache.stats()
+            print("{:>3} threads {:>4} shard(s) {:>12,.0f} ops/s  hit rate {:.2f}".format(
+                threads, num_shards, throughput, stats['hits'] / max(1, stats['hits'] + stats['misses'])))
+
+
+CACHES = {
+    'LRU_Cache': lambda capacity: LRU_Cache(capacity),
+    'SlotLRU_Cache': lambda capacity: SlotLRU_Cache(capacity),
+    'ShardedLRU_Cache': lambda capacity: ShardedLRU_Cache(capacity),
+    'LRU': lambda capacity: PolicyCache(capacity, LRUPolicy),
+    'LFU': lambda capacity: PolicyCache(capacity, LFUPolicy),
+    '2Q': lambda capacity: PolicyCache(capacity, TwoQPolicy),
+    'ARC': lambda capacity: PolicyCache(capacity, ARCPolicy),
+    'W-TinyLFU': lambda capacity: PolicyCache(capacity, WTinyLFUPolicy),
+}
+TRACES = ('zipf', 'scan', 'loop', 'mixed')
+
+
+def zipf_trace(length, keys, alpha=1.0, seed=0):
+    """
+    Description: Keys 0..keys-1 drawn with probability proportional to 1 / (rank + 1) ** alpha
+    """
+    rng = random.Random(seed)
+    weights = itertools.accumulate(1.0 / (rank + 1) ** alpha for rank in range(keys))
+    return rng.choices(range(keys), cum_weights=list(weights), k=length)
+
+
+def scan_trace(length, start=0):
+    """
+    Description: Every key once, so no cache can hit
+    """
+    return list(range(start, start + length))
+
+
+def loop_trace(length, keys):
+    """
+    Description: 0..keys-1 over and over, which LRU misses entirely once keys exceeds its capacity
+    """
+    return [index % keys for index in range(length)]
+
+
+def mixed_trace(length, keys, alpha=1.0, seed=0):
+    """
+    Description: Zipf traffic interrupted by scans: each block of keys // 2 accesses is four fifths
+    zipf over 0..keys-1 followed by one fifth new keys never seen again
+    """
+    block = max(5, keys // 2)
+    scan_length = block // 5
+    popular = zipf_trace(length, keys, alpha, seed)
+    trace = []
+    next_scan_key = keys
+    position = 0
+    while len(trace) < length:
+        trace.extend(popular[position:position + block - scan_length])
+        position += block - scan_length
+        trace.extend(range(next_scan_key, next_scan_key + scan_length))
+        next_scan_key += scan_length
+    return trace[:length]
+
+
+def load_trace(path, length=None):
+    """
+    Description: Keys from a file, one per line; with comma separated lines the first field is the key.
+    Integer keys are converted to int.
+    """
+    trace = []
+    with open(path) as f:
+        for line in itertools.islice(f, length):
+            key = line.split(',', 1)[0].strip()
+            trace.append(int(key) if key.lstrip('-').isdigit() else key)
+    return trace
+
+
+def make_trace(name, length, keys, alpha=1.0, seed=0):
+    if name == 'zipf':
+        return zipf_trace(length, keys, alpha, seed)
+    if name == 'scan':
+        return scan_trace(length)
+    if name == 'loop':
+        return loop_trace(length, keys)
+    if name == 'mixed':
+        return mixed_trace(length, keys, alpha, seed)
+    return load_trace(name, length)
+
+
+def replay_trace(cache, trace):
+    """
+    Description: A get per key and a set on a miss, as a read-through cache sees traffic
+    Returns:
+        (hit rate, ops/sec), counting a get and its set as one operation
+    """
+    get, set_ = cache.get, cache.set
+    hits = 0
+    start = time.perf_counter()
+    for key in trace:
+        if get(key) == -1:
+            set_(key, 1)
+        else:
+            hits += 1
+    elapsed = time.perf_counter() - start
+    return hits / len(trace), len(trace) / elapsed
+
+
+def replay(trace, capacities, cache_names):
+    """
+    Description: Replay trace against every named cache at every capacity
+    Returns:
+        list of result dicts
+    """
+    results = []
+    print("{:<18} {:>10} {:>9} {:>14} {:>12}".format('cache', 'capacity', 'hit rate', 'ops/s', 'bytes/entry'))
+    for capacity in capacities:
+        for name in cache_names:
+            hit_rate, throughput = replay_trace(CACHES[name](capacity), trace)
+            memory = bytes_per_entry(CACHES[name], capacity)
+            results.append({'cache': name, 'capacity': capacity, 'hit_rate': hit_rate,
+                            'ops_per_second': throughput, 'bytes_per_entry': memory})
+            print("{:<18} {:>10,} {:>9.4f} {:>14,.0f} {:>12.1f}".format(name, capacity, hit_rate, throughput, memory))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='LRU cache benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compact_parser = commands.add_parser('compact', help='SlotLRU_Cache against LRU_Cache')
+    compact_parser.add_argument('--entries', type=int, default=1000000)
+    sharded_parser = commands.add_parser('sharded', help='ShardedLRU_Cache against one global lock')
+    sharded_parser.add_argument('--entries', type=int, default=100000)
+    sharded_parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    sharded_parser.add_argument('--shards', type=int, default=16)
+    replay_parser = commands.add_parser('replay', help='replay a key trace across capacities')
+    replay_parser.add_argument('--trace', default='zipf', help='one of {} or a trace file'.format(', '.join(TRACES)))
+    replay_parser.add_argument('--length', type=int, default=1000000, help='accesses (at most, for a file)')
+    replay_parser.add_argument('--keys', type=int, default=100000, help='distinct keys of synthetic traces')
+    replay_parser.add_argument('--alpha', type=float, default=1.0, help='zipf skew')
+    replay_parser.add_argument('--seed', type=int, default=0)
+    replay_parser.add_argument('--capacities', type=int, nargs='+', default=[1000, 10000, 100000])
+    replay_parser.add_argument('--caches', nargs='+', choices=sorted(CACHES), default=['LRU_Cache', 'SlotLRU_Cache'])
+    replay_parser.add_argument('--json', default=None, help='also write the results to this file')
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        compact(args.entries)
+    elif args.command == 'sharded':
+        sharded(args.entries, args.threads, args.shards)
+    elif args.command == 'replay':
+        trace = make_trace(args.trace, args.length, args.keys, args.alpha, args.seed)
+        results = replay(trace, args.capacities, args.caches)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'trace': args.trace, 'length': len(trace), 'results': results}, f, indent=2)
@@ -0,0 +1,652 @@
+"""
+Cache variants built on, or alongside, LRU_Cache from problem_1-LRUCache.py.
+
+    SlotLRU_Cache       compact LRU keeping its entries in preallocated parallel arrays
+    ShardedLRU_Cache    thread-safe LRU, keys hashed across independently locked shards
+    ExpiringLRU_Cache   LRU_Cache with a time to live per entry and optional weighted capacity
+    TieredLRU_Cache     LRU_Cache spilling evicted entries to a disk SegmentStore
+    snapshot, restore   save an LRU_Cache in recency order and warm load it again
+
+The exercise file's name is not a valid module name, so it is loaded here once and its
+CacheData, Node, DLLQueue and LRU_Cache are re-exported for the other modules.
+"""
+import gc
+import heapq
+import importlib.util
+import mmap
+import os
+import pickle
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+NO_SLOT = -1
+SEGMENT_NAME = 'segment-{:06d}.log'
+SNAPSHOT_MAGIC = b'LRUSNAP1'
+MISSING = object()  # Miss sentinel that no cached value can equal
+
+
+def load_lru_module():
+    """
+    Description: Import problem_1-LRUCache.py, whose file name is not a valid module name
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'problem_1-LRUCache.py')
+    spec = importlib.util.spec_from_file_location('problem_1_lru_cache', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_exercise = load_lru_module()
+CacheData = _exercise.CacheData
+Node = _exercise.Node
+DLLQueue = _exercise.DLLQueue
+LRU_Cache = _exercise.LRU_Cache
+
+
+class SlotLRU_Cache(object):
+    """
+    Description: Compact LRU Cache with the same get/set API as LRU_Cache. Instead of a CacheData
+    and a Node object per entry, keys, values and prev/next links live in parallel arrays
+    preallocated to capacity and indexed by slot number. key_map maps a key to its slot.
+    """
+    __slots__ = ('capacity', 'num_elements', 'key_map', 'keys', 'values', 'prev', 'next', 'head', 'tail')
+
+    def __init__(self, capacity):
+        if capacity < 0:
+            print("Cannot use negative capacity for LRU. Defaulting to empty cache")
+            capacity = 0
+        self.capacity = capacity
+        self.num_elements = 0
+        self.key_map = dict()  # key -> slot
+        self.keys = [None] * capacity
+        self.values = [None] * capacity
+        self.prev = array('l', [NO_SLOT]) * capacity  # Links towards head (least recent)
+        self.next = array('l', [NO_SLOT]) * capacity  # Links towards tail (most recent)
+        self.head = NO_SLOT
+        self.tail = NO_SLOT
+
+    def is_full(self):
+        return self.num_elements == self.capacity
+
+    def _unlink(self, slot):
+        """
+        Description: Remove slot from the usage order
+        """
+        prev_slot, next_slot = self.prev[slot], self.next[slot]
+        if prev_slot == NO_SLOT:
+            self.head = next_slot
+        else:
+            self.next[prev_slot] = next_slot
+        if next_slot == NO_SLOT:
+            self.tail = prev_slot
+        else:
+            self.prev[next_slot] = prev_slot
+
+    def _append(self, slot):
+        """
+        Description: Link slot at the tail, making it the most recent
+        """
+        self.prev[slot] = self.tail
+        self.next[slot] = NO_SLOT
+        if self.tail == NO_SLOT:
+            self.head = slot
+        else:
+            self.next[self.tail] = slot
+        self.tail = slot
+
+    def _make_most_recent(self, slot):
+        if slot != self.tail:
+            self._unlink(slot)
+            self._append(slot)
+
+    def get(self, key):
+        """
+        Description: Retrieve item from provided key. Return -1 if nonexistent.
+        Arguments:
+            Key
+
+        Returns:
+            Value
+        """
+        slot = self.key_map.get(key)
+        if slot is None:
+            return -1
+        self._make_most_recent(slot)
+        return self.values[slot]
+
+    def set(self, key, value):
+        """
+        Description: Set the value of key. If the cache is at capacity remove the least recently used item.
+        Arguments:
+            Key, Value
+
+        Returns:
+            None
+        """
+        slot = self.key_map.get(key)
+        if slot is not None:
+            self.values[slot] = value
+            self._make_most_recent(slot)
+            return
+        if self.capacity == 0:
+            return
+        if self.is_full():
+            # Reuse the slot of the least recently used entry
+            slot = self.head
+            del self.key_map[self.keys[slot]]
+            self._unlink(slot)
+        else:
+            slot = self.num_elements
+            self.num_elements += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.key_map[key] = slot
+        self._append(slot)
+
+    def __str__(self):
+        items = []
+        slot = self.head
+        while slot != NO_SLOT:
+            items.append("({}: {})".format(self.keys[slot], self.values[slot]))
+            slot = self.next[slot]
+        return " -> ".join(items)
+
+
+class ShardedLRU_Cache(object):
+    """
+    Description: Thread-safe LRU Cache. Keys are hashed across independent LRU shards, each guarded
+    by its own lock, so threads working on different shards do not wait for each other. Total
+    capacity is split across the shards, so eviction is least recently used within a shard.
+    """
+    def __init__(self, capacity, num_shards=16, cache_class=SlotLRU_Cache):
+        if capacity < 0:
+            print("Cannot use negative capacity for LRU. Defaulting to empty cache")
+            capacity = 0
+        self.capacity = capacity
+        # No more shards than entries, so that every shard can hold something
+        num_shards = max(1, min(num_shards, capacity))
+        base, extra = divmod(capacity, num_shards)
+        self.shards = [cache_class(base + (1 if index < extra else 0)) for index in range(num_shards)]
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+        # Per shard counters, only updated under that shard's lock
+        self.hits = [0] * num_shards
+        self.misses = [0] * num_shards
+        self.evictions = [0] * num_shards
+
+    def _shard_index(self, key):
+        return hash(key) % len(self.shards)
+
+    def get(self, key):
+        """
+        Description: Retrieve item from provided key. Return -1 if nonexistent.
+        Arguments:
+            Key
+
+        Returns:
+            Value
+        """
+        index = self._shard_index(key)
+        shard = self.shards[index]
+        with self.locks[index]:
+            if key in shard.key_map:
+                self.hits[index] += 1
+                return shard.get(key)
+            self.misses[index] += 1
+            return -1
+
+    def set(self, key, value):
+        """
+        Description: Set the value of key, evicting the least recently used item of its shard if that shard is full
+        Arguments:
+            Key, Value
+
+        Returns:
+            None
+        """
+        index = self._shard_index(key)
+        shard = self.shards[index]
+        with self.locks[index]:
+            if key not in shard.key_map and shard.is_full() and shard.capacity:
+                self.evictions[index] += 1
+            shard.set(key, value)
+
+    def stats(self):
+        """
+        Description: Counters summed over all shards. Each shard is read under its lock, but the
+        shards are not frozen together, so totals are approximate while other threads are running.
+
+        Returns:
+            dict of hits, misses, evictions and entries
+        """
+        totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0}
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                totals['hits'] += self.hits[index]
+                totals['misses'] += self.misses[index]
+                totals['evictions'] += self.evictions[index]
+                totals['entries'] += shard.num_elements
+        return totals
+
+
+def _unlink(queue, node):
+    """
+    Description: Unlink a node from anywhere in a DLLQueue
+    Arguments:
+        DLLQueue, reference to Node to be removed
+
+    Returns:
+        None
+    """
+    if node.prev:
+        node.prev.next = node.next
+    else:
+        queue.head = node.next
+    if node.next:
+        node.next.prev = node.prev
+    else:
+        queue.tail = node.prev
+    node.prev = node.next = None
+    queue.num_elements -= 1
+
+
+class ExpiringCacheData(CacheData):
+    """
+    Description: CacheData with the time it expires at (None for never) and its weight
+    """
+    def __init__(self, key, value, expires_at, weight):
+        super().__init__(key, value)
+        self.expires_at = expires_at
+        self.weight = weight
+
+
+class ExpiringLRU_Cache(LRU_Cache):
+    """
+    Description: LRU Cache whose entries can expire and whose capacity can be a total weight.
+
+    Entries expire ttl seconds after they are set. An expired entry is dropped when it is next
+    looked up, and at most every sweep_interval seconds a get or set also drops every expired
+    entry, found through a heap of expiry times, so entries nobody reads do not linger.
+
+    With a weigher(key, value), e.g. returning len(value) in bytes, capacity bounds the sum of the
+    weights and a set evicts as many least recently used entries as needed. Without one every
+    entry weighs 1 and capacity counts entries, as in LRU_Cache.
+    """
+    def __init__(self, capacity, ttl=None, weigher=None, sweep_interval=None, clock=time.monotonic):
+        super().__init__(capacity)
+        self.ttl = ttl  # Default time to live in seconds, None for no expiry
+        self.weigher = weigher
+        self.clock = clock
+        self.sweep_interval = sweep_interval if sweep_interval is not None else (ttl or 0)
+        self.next_sweep = clock() + self.sweep_interval
+        self.total_weight = 0
+        self.expiry_heap = []  # (expires_at, sequence, key), with stale entries skipped when popped
+        self.sequence = 0
+
+    def is_full(self):
+        return self.total_weight >= self.capacity
+
+    def _remove(self, node):
+        """
+        Description: Drop an entry from the queue and key_map
+        """
+        _unlink(self.usage_queue, node)
+        del self.key_map[node.data.key]
+        self.num_elements -= 1
+        self.total_weight -= node.data.weight
+
+    def _maybe_sweep(self, now):
+        if self.expiry_heap and now >= self.next_sweep:
+            self.expire(now)
+
+    def expire(self, now=None):
+        """
+        Description: Drop every expired entry
+        Arguments:
+            Current time, defaults to the clock
+
+        Returns:
+            Number of entries dropped
+        """
+        now = self.clock() if now is None else now
+        self.next_sweep = now + self.sweep_interval
+        heap = self.expiry_heap
+        dropped = 0
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            node = self.key_map.get(key)
+            # Skip heap entries left behind by an update or eviction of the key
+            if node is not None and node.data.expires_at == expires_at:
+                self._remove(node)
+                dropped += 1
+        if len(heap) > 2 * self.num_elements + 16:
+            # Mostly stale entries, rebuild from the live ones
+            self.expiry_heap = [item for item in heap if item[2] in self.key_map and
+                                self.key_map[item[2]].data.expires_at == item[0]]
+            heapq.heapify(self.expiry_heap)
+        return dropped
+
+    def get(self, key, default=-1):
+        """
+        Description: Retrieve item from provided key. Return default, -1 unless given, if nonexistent or expired.
+        Arguments:
+            Key, optional default
+
+        Returns:
+            Value
+        """
+        now = self.clock()
+        self._maybe_sweep(now)
+        node = self.key_map.get(key)
+        if node is None:
+            return default
+        if node.data.expires_at is not None and node.data.expires_at <= now:
+            self._remove(node)
+            return default
+        self._make_most_recent(node)
+        return node.data.value
+
+    def set(self, key, value, ttl=None):
+        """
+        Description: Set the value of key, then evict least recently used items until the cache is within capacity
+        Arguments:
+            Key, Value, time to live in seconds overriding the cache's ttl
+
+        Returns:
+            None
+        """
+        now = self.clock()
+        self._maybe_sweep(now)
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else now + ttl
+        weight = self.weigher(key, value) if self.weigher else 1
+        node = self.key_map.get(key)
+        if node is not None:
+            self._remove(node)
+        if weight > self.capacity:
+            # Could never fit, so do not flush the cache for it
+            return
+        while self.total_weight + weight > self.capacity:
+            self._remove(self.usage_queue.head)
+        self.key_map[key] = self.usage_queue.enqueue(ExpiringCacheData(key, value, expires_at, weight))
+        self.num_elements += 1
+        self.total_weight += weight
+        if expires_at is not None:
+            self.sequence += 1
+            heapq.heappush(self.expiry_heap, (expires_at, self.sequence, key))
+
+
+class SegmentStore(object):
+    """
+    Description: Append-only store of pickled values on disk, used as the second tier of TieredLRU_Cache.
+    Values are appended to fixed size segment files, preallocated and memory-mapped, and an
+    in-memory index maps each key to (segment, offset, length) of its latest value. Overwritten
+    and removed values are not reclaimed one by one: once the store reaches max_bytes, the oldest
+    segment is dropped whole together with every key still in it.
+    """
+    def __init__(self, directory, max_bytes=64 << 20, segment_bytes=1 << 20):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max(1, max_bytes // segment_bytes)
+        self.index = dict()  # key -> (segment id, offset, length)
+        self.segments = OrderedDict()  # segment id -> (file, mmap, keys appended), oldest first
+        self.next_segment = 0
+        self.offset = 0  # Write position in the newest segment
+        self.spills = 0
+        self.dropped = 0  # Keys lost with dropped segments
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            # Left by an earlier run; the index does not survive a restart
+            if name.startswith('segment-') and name.endswith('.log'):
+                os.remove(os.path.join(directory, name))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def _path(self, segment_id):
+        return os.path.join(self.directory, SEGMENT_NAME.format(segment_id))
+
+    def _new_segment(self):
+        if len(self.segments) == self.max_segments:
+            self._drop_oldest()
+        segment_id = self.next_segment
+        self.next_segment += 1
+        f = open(self._path(segment_id), 'w+b')
+        f.truncate(self.segment_bytes)
+        self.segments[segment_id] = (f, mmap.mmap(f.fileno(), self.segment_bytes), [])
+        self.offset = 0
+        return segment_id
+
+    def _drop_oldest(self):
+        segment_id, (f, mapped, keys) = self.segments.popitem(last=False)
+        for key in keys:
+            location = self.index.get(key)
+            if location is not None and location[0] == segment_id:
+                del self.index[key]
+                self.dropped += 1
+        mapped.close()
+        f.close()
+        os.remove(self._path(segment_id))
+
+    def put(self, key, value):
+        """
+        Description: Append value as the latest value of key
+        Arguments:
+            Key, Value (both picklable)
+
+        Returns:
+            True if stored, False if the pickled value is larger than a segment
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.segment_bytes:
+            return False
+        if not self.segments or self.offset + len(data) > self.segment_bytes:
+            self._new_segment()
+        segment_id = next(reversed(self.segments))
+        _, mapped, keys = self.segments[segment_id]
+        mapped[self.offset:self.offset + len(data)] = data
+        keys.append(key)
+        self.index[key] = (segment_id, self.offset, len(data))
+        self.offset += len(data)
+        self.spills += 1
+        return True
+
+    def get(self, key, default=None):
+        location = self.index.get(key)
+        if location is None:
+            return default
+        segment_id, offset, length = location
+        return pickle.loads(self.segments[segment_id][1][offset:offset + length])
+
+    def pop(self, key, default=None):
+        """
+        Description: Remove key from the index and return its value
+        """
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            return default
+        del self.index[key]
+        return value
+
+    def discard(self, key):
+        self.index.pop(key, None)
+
+    def close(self):
+        while self.segments:
+            self._drop_oldest()
+        self.index.clear()
+
+
+class TieredLRU_Cache(LRU_Cache):
+    """
+    Description: LRU Cache with a disk second tier. The entry evicted from memory by set is spilled to a
+    SegmentStore instead of being dropped, and get falls through to the store, promoting a hit back
+    into memory, which may spill another entry.
+    """
+    def __init__(self, capacity, store):
+        super().__init__(capacity)
+        self.store = store
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key, default=-1):
+        """
+        Description: Retrieve item from memory, else from disk. Return default, -1 unless given, if in neither.
+        Arguments:
+            Key, optional default
+
+        Returns:
+            Value
+        """
+        if key in self.key_map:
+            self.memory_hits += 1
+            return super().get(key)
+        value = self.store.pop(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self.disk_hits += 1
+        self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """
+        Description: Set the value of key, spilling the least recently used item to disk if memory is full
+        Arguments:
+            Key, Value
+
+        Returns:
+            None
+        """
+        if key not in self.key_map and self.capacity and self.is_full():
+            evicted = self.usage_queue.head.data
+            self.store.put(evicted.key, evicted.value)
+        # The value in memory is now the latest, an older copy on disk must never be promoted
+        self.store.discard(key)
+        super().set(key, value)
+
+
+def snapshot(cache, path):
+    """
+    Description: Write the key/value pairs of an LRU_Cache, or a subclass, to a file, least recent first.
+    Entries of an ExpiringLRU_Cache that have already expired are left out. The file is replaced
+    atomically, so a crash mid-write leaves the previous snapshot intact.
+    Arguments:
+        Cache, file path
+
+    Returns:
+        Number of entries written
+    """
+    now = cache.clock() if isinstance(cache, ExpiringLRU_Cache) else None
+    keys, values = [], []
+    node = cache.usage_queue.head
+    while node:
+        if now is None or node.data.expires_at is None or node.data.expires_at > now:
+            keys.append(node.data.key)
+            values.append(node.data.value)
+        node = node.next
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        pickle.dump((cache.capacity, keys, values), f, pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+    return len(keys)
+
+
+def read_snapshot(path):
+    """
+    Description: Keys and values of a snapshot, least recent first
+    Arguments:
+        File path
+
+    Returns:
+        (keys, values) lists
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError("{} is not an LRU_Cache snapshot".format(path))
+        _, keys, values = pickle.load(f)
+    return keys, values
+
+
+def _expiring_entries(cache, keys, values, now):
+    """
+    Description: ExpiringCacheData for the snapshot entries an ExpiringLRU_Cache keeps, least recent
+    first. Snapshots hold no expiry times or weights, so every entry gets the cache's ttl from now
+    and is weighed again. As with a set per entry, entries heavier than the whole cache are skipped
+    and the most recent ones that fit within capacity are kept.
+    """
+    expires_at = None if cache.ttl is None else now + cache.ttl
+    entries = []
+    total_weight = 0
+    for index in range(len(keys) - 1, -1, -1):
+        weight = cache.weigher(keys[index], values[index]) if cache.weigher else 1
+        if weight > cache.capacity:
+            continue
+        if total_weight + weight > cache.capacity:
+            break
+        total_weight += weight
+        entries.append(ExpiringCacheData(keys[index], values[index], expires_at, weight))
+    entries.reverse()
+    return entries
+
+
+def restore(cache, path):
+    """
+    Description: Replace the contents of an LRU_Cache, or a subclass, with a snapshot, keeping its
+    recency order. The key_map and queue are linked up in one pass instead of calling set per entry.
+    If the snapshot holds more than the cache's capacity, the most recent entries are kept. An
+    ExpiringLRU_Cache gives every entry its ttl from now and weighs it with its weigher.
+    Arguments:
+        Cache, file path
+
+    Returns:
+        Number of entries restored
+    """
+    keys, values = read_snapshot(path)
+    expiring = isinstance(cache, ExpiringLRU_Cache)
+    now = cache.clock() if expiring else None
+    key_map = dict()
+    queue = DLLQueue()
+    prev = None
+    # Millions of new objects would set off repeated garbage collections that find nothing to free
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        if expiring:
+            entries = _expiring_entries(cache, keys, values, now)
+        else:
+            skip = max(0, len(keys) - cache.capacity)
+            entries = [CacheData(keys[index], values[index]) for index in range(skip, len(keys))]
+        for data in entries:
+            node = Node(data)
+            node.prev = prev
+            if prev:
+                prev.next = node
+            else:
+                queue.head = node
+            key_map[data.key] = node
+            prev = node
+    finally:
+        if collecting:
+            gc.enable()
+    queue.tail = prev
+    queue.num_elements = len(key_map)
+    cache.key_map = key_map
+    cache.usage_queue = queue
+    cache.num_elements = len(key_map)
+    if expiring:
+        cache.total_weight = sum(data.weight for data in entries)
+        # Entries share one expiry time, so in sequence order the list is already a heap
+        cache.expiry_heap = []
+        if cache.ttl is not None:
+            cache.expiry_heap = [(data.expires_at, cache.sequence + index, data.key)
+                                 for index, data in enumerate(entries, 1)]
+            cache.sequence += len(entries)
+        cache.next_sweep = now + cache.sweep_interval
+    return cache.num_elements
@@ -1,5 +1,7 @@
 import unittest
 import os
+import sys
+import tempfile
 from pprint import pprint
 
 def find_files(suffix, path):
@@ -18,43 +20,54 @@ def find_files(suffix, path):
     Returns:
        a list of paths
     """
-    path_list = list()  # empty list to hold results
-    visited = set()  # Set to hold realpath of all visited subdirectories - this is needed for softlinks that could cause infinite loop
-    _find_files(suffix, path, path_list, visited)  # Recursive Helper
-    return path_list
+    return list(iter_files(suffix, path))
 
 
-def _find_files(suffix, path, path_list, visited):
+def iter_files(suffix, path):
     """
-    Recursive helper for find files
+    Generator version of find_files, yielding each matching path as soon as it is found
+
+    Directories still to be walked are kept on an explicit stack rather than the call stack, so
+    trees deeper than the Python recursion limit work. Each directory is read with os.scandir,
+    whose entries already know whether they are files or directories, so most entries cost no
+    extra stat call.
 
     Args:
       suffix(str): suffix if the file name to be found
       path(str): path of the file system
-      path_list(list): list to hold result
-      visited(set): set of visited sub-directories
 
-    Returns:
-       None
+    Yields:
+       paths of matching files
     """
     if not os.path.isdir(path):
         print("The path {} does not exist".format(path))
         return
-    candidates = os.listdir(path)
-    for candidate in candidates:
-        # Form full-path by merging candidate name with base-path, converting any softlinks and relpath to absolute path
-        candidate = os.path.join(os.path.realpath(path), candidate)
-        if os.path.isfile(candidate):
-            if candidate.endswith(suffix):  # Check for match with given suffix
-                path_list.append(candidate)
-        elif os.path.isdir(candidate):
-            # recurse on sub-directories if not already visited (only applicable to circular softlinks)
-            if candidate not in visited:
-                visited.add(candidate)
-                _find_files(suffix, candidate, path_list, visited)
+    root = os.path.realpath(path)
+    visited = {root}  # Set to hold realpath of all visited subdirectories - this is needed for softlinks that could cause infinite loop
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        subdirectories = list()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        if entry.path.endswith(suffix):  # Check for match with given suffix
+                            yield entry.path
+                    elif entry.is_dir():
+                        # Below a realpath only softlinks can lead back somewhere visited, so only they need resolving
+                        subdirectory = os.path.realpath(entry.path) if entry.is_symlink() else entry.path
+                        if subdirectory not in visited:
+                            visited.add(subdirectory)
+                            subdirectories.append(subdirectory)
+        except OSError:
+            # Unreadable directory, skipped as os.walk does
+            continue
+        # Reversed so that sub-directories are walked in the order they were listed
+        stack.extend(reversed(subdirectories))
 
 class TestFileRecursion(unittest.TestCase):
-    BASEPATH = '/vagrant/GitHub/ADSND/P1/data/problem_2-FileRecursion/'
+    BASEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'problem_2-FileRecursion')
 
     def setUp(self):
         print("\n\n****{}****".format(self._testMethodName))
@@ -91,5 +104,52 @@ class TestFileRecursion(unittest.TestCase):
         # The path /vagrant/GitHub/ADSND/P1/data/problem_2-FileRecursion/invalid-dir does not exist
         # []
 
+    def test_case5_finds_each_match_once(self):
+        base = os.path.realpath(os.path.join(self.BASEPATH, 'testdir'))
+        found = find_files('.c', base)
+        pprint(found)
+        self.assertEqual(sorted(os.path.relpath(path, base) for path in found),
+                         ['subdir1/a.c', 'subdir3/subsubdir1/b.c', 'subdir5/a.c', 't1.c'])
+        self.assertEqual(find_files('.c', os.path.join(self.BASEPATH, 'testdir-3')), [])
+
+    def test_case6_softlink_loop_in_temporary_tree(self):
+        with tempfile.TemporaryDirectory() as base:
+            base = os.path.realpath(base)
+            os.makedirs(os.path.join(base, 'a', 'b'))
+            open(os.path.join(base, 'a', 'b', 'x.c'), 'w').close()
+            os.symlink(os.path.join(base, 'a'), os.path.join(base, 'a', 'b', 'ln-a'))  # Loop back up
+            os.symlink(os.path.join(base, 'a', 'b'), os.path.join(base, 'ln-b'))  # Second way into b
+            found = find_files('.c', base)
+            pprint(found)
+            self.assertEqual(found, [os.path.join(base, 'a', 'b', 'x.c')])
+
+    def test_case7_deeper_than_recursion_limit(self):
+        base = os.path.realpath(tempfile.mkdtemp())
+        depth = sys.getrecursionlimit() + 100
+        # os.makedirs and shutil.rmtree recurse themselves, so build and remove the tree level by level
+        levels = [base]
+        for _ in range(depth):
+            levels.append(os.path.join(levels[-1], 'd'))
+            os.mkdir(levels[-1])
+        deep_file = os.path.join(levels[-1], 'deep.c')
+        open(deep_file, 'w').close()
+        try:
+            self.assertEqual(find_files('.c', base), [deep_file])
+        finally:
+            os.remove(deep_file)
+            for level in reversed(levels):
+                os.rmdir(level)
+
+    def test_case8_matches_are_streamed(self):
+        with tempfile.TemporaryDirectory() as base:
+            base = os.path.realpath(base)
+            os.makedirs(os.path.join(base, 'sub'))
+            open(os.path.join(base, 'first.c'), 'w').close()
+            matches = iter_files('.c', base)
+            self.assertEqual(next(matches), os.path.join(base, 'first.c'))
+            # sub has not been read yet, so a file created now is still found
+            open(os.path.join(base, 'sub', 'late.c'), 'w').close()
+            self.assertEqual(list(matches), [os.path.join(base, 'sub', 'late.c')])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import unittest
+
+from eviction_policies import ARCPolicy, LFUPolicy, LRUPolicy, PolicyCache, TwoQPolicy, WTinyLFUPolicy
+
+
+class TestPolicyCache(unittest.TestCase):
+    POLICIES = (LRUPolicy, LFUPolicy, TwoQPolicy, ARCPolicy, WTinyLFUPolicy)
+
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+
+    def test_case1_lru_policy(self):
+        our_cache = PolicyCache(5, LRUPolicy)
+        for key in range(1, 5):
+            our_cache.set(key, key)
+
+        self.assertEqual(our_cache.get(1), 1)
+        self.assertEqual(our_cache.get(2), 2)
+        self.assertEqual(our_cache.get(9), -1)  # 9 is not present in the cache
+
+        our_cache.set(5, 5)
+        our_cache.set(6, 6)
+
+        self.assertEqual(our_cache.get(3), -1)  # 3 was the least recently used entry
+        print(our_cache, our_cache.hit_rate())
+
+    def test_case2_lfu_policy_evicts_least_used(self):
+        our_cache = PolicyCache(3, LFUPolicy)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2)
+        our_cache.set(3, 3)
+        our_cache.get(1)
+        our_cache.get(1)
+        our_cache.get(3)
+        our_cache.set(4, 4)  # 2 was used least
+
+        self.assertEqual(our_cache.get(2), -1)
+        our_cache.set(5, 5)  # 3 and 4 were both used once, 4 more recently
+        self.assertEqual(our_cache.get(4), -1)
+        self.assertEqual(our_cache.get(1), 1)
+        self.assertEqual(our_cache.get(3), 3)
+
+    def test_case3_hot_keys_survive_a_scan(self):
+        # Hot keys used twice, then a scan five times the capacity
+        for policy in self.POLICIES:
+            our_cache = PolicyCache(20, policy)
+            for key in range(10):
+                our_cache.set(key, key)
+                our_cache.get(key)
+            for key in range(100, 200):
+                our_cache.set(key, key)
+            survivors = sum(our_cache.get(key) != -1 for key in range(10))
+            print(policy.__name__, survivors)
+            # 2Q does not promote hits on keys still in its first FIFO, see test_case4
+            self.assertEqual(survivors, 0 if policy in (LRUPolicy, TwoQPolicy) else 10)
+
+    def test_case4_hot_keys_seen_again_between_scans(self):
+        # Hot keys come back after more distinct keys than the capacity, so LRU never keeps them
+        for policy in (LRUPolicy, TwoQPolicy, WTinyLFUPolicy):
+            our_cache = PolicyCache(30, policy)
+            scan_key = 1000
+            for rounds in range(20):
+                if rounds == 5:
+                    our_cache.hits = our_cache.misses = 0
+                for key in range(10):
+                    if our_cache.get(key) == -1:
+                        our_cache.set(key, key)
+                for _ in range(25):
+                    our_cache.set(scan_key, scan_key)
+                    scan_key += 1
+            print(policy.__name__, our_cache.hit_rate())
+            self.assertEqual(our_cache.hit_rate(), 0.0 if policy is LRUPolicy else 1.0)
+
+    def test_case5_capacity_is_never_exceeded(self):
+        for policy in self.POLICIES:
+            for capacity in (0, 1, 2, 7, 50):
+                our_cache = PolicyCache(capacity, policy)
+                for step in range(5000):
+                    key = (step * step) % 97 if step % 3 else step
+                    value = our_cache.get(key)
+                    if value == -1:
+                        our_cache.set(key, key)
+                    else:
+                        self.assertEqual(value, key)
+                    self.assertLessEqual(len(our_cache.key_map), capacity)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import asyncio
+import unittest
+
+from loading_caches import AsyncLoadingCache, make_key, memoize
+
+
+class TestMemoize(unittest.TestCase):
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+
+    def test_case1_counts_hits_misses_and_evictions(self):
+        calls = []
+
+        @memoize(capacity=2)
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(4), 16)  # Evicts 2
+        self.assertEqual(square(2), 4)
+        self.assertEqual(calls, [2, 3, 4, 2])
+        print(square.stats)
+        self.assertEqual((square.stats.hits, square.stats.misses, square.stats.evictions), (1, 4, 2))
+        self.assertGreater(square.stats.load_seconds, 0)
+        self.assertEqual(square.__name__, 'square')
+
+    def test_case2_minus_one_is_a_cacheable_value(self):
+        calls = []
+
+        @memoize()
+        def minus_one(x):
+            calls.append(x)
+            return -1
+
+        minus_one(5)
+        minus_one(5)
+        self.assertEqual(calls, [5])
+        self.assertEqual(minus_one.stats.hits, 1)
+
+    def test_case3_typed_and_keyword_keys(self):
+        @memoize(typed=True)
+        def identity(x, scale=1):
+            return x * scale
+
+        self.assertIs(type(identity(1)), int)
+        self.assertIs(type(identity(1.0)), float)  # Not the cached int
+        identity(1, scale=2)
+        identity(x=1, scale=2)  # Keyword arguments are keyed apart from positional ones
+        self.assertEqual(identity.stats.misses, 4)
+        self.assertNotEqual(make_key((1,), {}), make_key((1,), {}, typed=True))
+        self.assertEqual(make_key((1,), {}), make_key((1.0,), {}))
+
+    def test_case4_exceptions_and_clear(self):
+        @memoize(capacity=4)
+        def invert(x):
+            return 1 / x
+
+        with self.assertRaises(ZeroDivisionError):
+            invert(0)
+        self.assertEqual(invert.cache.num_elements, 0)
+        invert(2)
+        stats, cache = invert.stats, invert.cache
+        invert.cache_clear()
+        self.assertEqual(invert.stats.misses, 0)
+        self.assertEqual(invert.stats.load_seconds, 0.0)
+        self.assertEqual(cache.num_elements, 0)
+        invert(2)
+        invert(2)
+        # Cleared in place, so references taken before cache_clear see the new calls
+        self.assertIs(invert.stats, stats)
+        self.assertIs(invert.cache, cache)
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+        self.assertEqual(cache.get((2,)), 0.5)
+        for x in range(1, 6):
+            invert(x)
+        self.assertEqual(stats.evictions, 1)
+
+
+class TestAsyncLoadingCache(unittest.TestCase):
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+        self.now = 0.0
+        self.loads = []
+
+    def clock(self):
+        return self.now
+
+    async def loader(self, key):
+        self.loads.append(key)
+        await asyncio.sleep(0.01)
+        if key < 0:
+            raise ValueError(key)
+        return key * 10 + len(self.loads)
+
+    async def batch_loader(self, keys):
+        self.loads.append(tuple(keys))
+        await asyncio.sleep(0.01)
+        return {key: key * 10 for key in keys if key != 13}
+
+    def test_case1_concurrent_misses_load_once(self):
+        async def scenario():
+            our_cache = AsyncLoadingCache(10, self.loader)
+            values = await asyncio.gather(*[our_cache.get(7) for _ in range(100)])
+            self.assertEqual(set(values), {71})
+            self.assertEqual(self.loads, [7])
+            self.assertEqual((our_cache.misses, our_cache.coalesced), (100, 99))
+            self.assertEqual(await our_cache.get(7), 71)
+            self.assertEqual(our_cache.hits, 1)
+        asyncio.run(scenario())
+
+    def test_case2_failed_load_is_shared_and_not_cached(self):
+        async def scenario():
+            our_cache = AsyncLoadingCache(10, self.loader)
+            results = await asyncio.gather(our_cache.get(-1), our_cache.get(-1), return_exceptions=True)
+            self.assertTrue(all(isinstance(result, ValueError) for result in results))
+            self.assertEqual(self.loads, [-1])
+            with self.assertRaises(ValueError):
+                await our_cache.get(-1)
+            self.assertEqual(self.loads, [-1, -1])
+            self.assertEqual(our_cache.in_flight, {})
+        asyncio.run(scenario())
+
+    def test_case3_get_many_batches_misses(self):
+        async def scenario():
+            our_cache = AsyncLoadingCache(10, batch_loader=self.batch_loader)
+            await our_cache.get(1)
+            pending = asyncio.ensure_future(our_cache.get(2))
+            await asyncio.sleep(0)  # 2 is now in flight
+            values = await our_cache.get_many([1, 2, 3, 4, 3])
+            self.assertEqual(values, {1: 10, 2: 20, 3: 30, 4: 40})
+            self.assertEqual(self.loads, [(1,), (2,), (3, 4)])  # One batch for the keys not already loading
+            self.assertEqual(await pending, 20)
+            with self.assertRaises(KeyError):
+                await our_cache.get_many([5, 13])  # Missing from the batch result
+            self.assertEqual(await our_cache.get(5), 50)  # But 5 was cached
+        asyncio.run(scenario())
+
+    def test_case4_stale_while_revalidate(self):
+        async def scenario():
+            our_cache = AsyncLoadingCache(10, self.loader, refresh_after=5, clock=self.clock)
+            self.assertEqual(await our_cache.get(3), 31)
+            self.now = 6
+            stale = await asyncio.gather(our_cache.get(3), our_cache.get(3))
+            self.assertEqual(stale, [31, 31])  # Served at once while one refresh runs
+            await asyncio.sleep(0.05)
+            self.assertEqual(await our_cache.get(3), 32)
+            self.assertEqual(self.loads, [3, 3])
+            self.assertEqual(our_cache.refreshes, 1)
+        asyncio.run(scenario())
+
+    def test_case5_ttl_expiry_reloads(self):
+        async def scenario():
+            our_cache = AsyncLoadingCache(10, self.loader, ttl=5, clock=self.clock)
+            await our_cache.get(1)
+            self.now = 5
+            self.assertEqual(await our_cache.get(1), 12)
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,316 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from lru_caches import (LRU_Cache, ExpiringLRU_Cache, SegmentStore, ShardedLRU_Cache, SlotLRU_Cache,
+                        TieredLRU_Cache, restore, snapshot)
+
+
+class TestLRUSnapshot(unittest.TestCase):
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'lru.snapshot')
+
+    def test_case1_restore_keeps_recency_order(self):
+        our_cache = LRU_Cache(3)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2)
+        our_cache.set(3, 3)
+        our_cache.get(1)
+        self.assertEqual(snapshot(our_cache, self.path), 3)
+
+        restored = LRU_Cache(3)
+        self.assertEqual(restore(restored, self.path), 3)
+        print(restored)
+        self.assertEqual(str(restored.usage_queue), str(our_cache.usage_queue))
+        restored.set(4, 4)  # 2 is still the least recently used
+        self.assertEqual(restored.get(2), -1)
+        self.assertEqual(restored.get(1), 1)
+        self.assertEqual(restored.get(3), 3)
+
+    def test_case2_smaller_cache_keeps_most_recent(self):
+        our_cache = LRU_Cache(5)
+        for key in range(5):
+            our_cache.set(key, str(key))
+        snapshot(our_cache, self.path)
+
+        restored = LRU_Cache(2)
+        restore(restored, self.path)
+        self.assertEqual(sorted(restored.key_map), [3, 4])
+        self.assertEqual(restored.usage_queue.head.data.key, 3)
+        self.assertEqual(restored.usage_queue.head.prev, None)
+        self.assertEqual(restore(LRU_Cache(0), self.path), 0)
+
+    def test_case3_empty_and_invalid_files(self):
+        snapshot(LRU_Cache(3), self.path)
+        restored = LRU_Cache(3)
+        restored.set('old', 1)
+        self.assertEqual(restore(restored, self.path), 0)
+        self.assertEqual(restored.get('old'), -1)
+        restored.set(1, 1)
+        self.assertEqual(restored.get(1), 1)
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        with self.assertRaises(ValueError):
+            restore(restored, self.path)
+
+    def test_case4_expiring_cache_gets_ttl_and_weights_again(self):
+        self.now = 100.0
+        clock = lambda: self.now
+        our_cache = ExpiringLRU_Cache(10, ttl=5, sweep_interval=1000, clock=clock)
+        our_cache.set('gone', 'x', ttl=1)
+        our_cache.set('a', 'xxxxx')
+        our_cache.set('b', 'x' * 10)
+        our_cache.set('c', 'xx')
+        self.now = 102.0
+        self.assertEqual(snapshot(our_cache, self.path), 3)  # 'gone' had expired
+
+        restored = ExpiringLRU_Cache(6, ttl=10, weigher=lambda key, value: len(value), clock=clock)
+        restored.set('old', 'x')
+        self.assertEqual(restore(restored, self.path), 1)  # b weighs more than 6, a with c would weigh 7
+        self.assertEqual(list(restored.key_map), ['c'])
+        self.assertEqual(restored.total_weight, 2)
+        self.assertEqual(restored.get('old'), -1)
+        restored.set('d', 'xxxx')  # Fits next to c
+        self.assertEqual(restored.total_weight, 6)
+        self.now = 111.9
+        self.assertEqual(restored.get('c'), 'xx')  # The cache's ttl counts from the restore
+        self.now = 112.0
+        self.assertEqual(restored.get('c'), -1)  # Also sweeps d, set at 102
+        self.assertEqual(restored.num_elements, 0)
+        self.assertEqual(restored.total_weight, 0)
+
+
+class TestExpiringLRU(unittest.TestCase):
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def test_case1_entries_expire_lazily(self):
+        our_cache = ExpiringLRU_Cache(5, ttl=10, sweep_interval=1000, clock=self.clock)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2, ttl=30)  # Own time to live
+        self.now = 9
+        self.assertEqual(our_cache.get(1), 1)
+        self.now = 10
+        self.assertEqual(our_cache.get(1), -1)  # Expired, even though just used
+        self.assertEqual(our_cache.get(2), 2)
+        self.assertEqual(our_cache.num_elements, 1)
+        our_cache.set(2, 3)  # Updating restarts its time to live, at the cache's default
+        self.now = 19
+        self.assertEqual(our_cache.get(2), 3)
+        self.now = 20
+        self.assertEqual(our_cache.get(2), -1)
+
+    def test_case2_periodic_sweep(self):
+        our_cache = ExpiringLRU_Cache(100, ttl=5, sweep_interval=5, clock=self.clock)
+        for key in range(50):
+            our_cache.set(key, key)
+        our_cache.set(99, 99, ttl=60)
+        self.now = 6
+        our_cache.get(99)  # Not one of the expired keys, but triggers the sweep
+        self.assertEqual(our_cache.num_elements, 1)
+        self.assertEqual(list(our_cache.key_map), [99])
+        self.assertEqual(our_cache.expire(), 0)
+
+    def test_case3_weighted_capacity(self):
+        our_cache = ExpiringLRU_Cache(10, weigher=lambda key, value: len(value))
+        our_cache.set('a', 'xxxx')
+        our_cache.set('b', 'xxx')
+        our_cache.set('c', 'xx')
+        our_cache.get('a')
+        our_cache.set('d', 'xxxxxx')  # Needs 6 of 10, evicts b and c but not a, the most recent
+
+        self.assertEqual(our_cache.get('b'), -1)
+        self.assertEqual(our_cache.get('c'), -1)
+        self.assertEqual(our_cache.get('a'), 'xxxx')
+        self.assertEqual(our_cache.total_weight, 10)
+        our_cache.set('e', 'x' * 11)  # Heavier than the whole cache, not cached
+        self.assertEqual(our_cache.get('e'), -1)
+        self.assertEqual(our_cache.get('d'), 'xxxxxx')
+        our_cache.set('a', 'x')  # Shrinking an entry frees its weight
+        self.assertEqual(our_cache.total_weight, 7)
+        print(our_cache)
+
+    def test_case4_behaves_as_lru_without_ttl_or_weigher(self):
+        our_cache = ExpiringLRU_Cache(3)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2)
+        our_cache.set(3, 3)
+        our_cache.set(2, 4)
+        our_cache.set(4, 16)
+        self.assertEqual(our_cache.get(1), -1)
+        self.assertEqual(our_cache.get(2), 4)
+        self.assertEqual(ExpiringLRU_Cache(0).get(1), -1)
+
+
+class TestTieredLRU(unittest.TestCase):
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_case1_spill_and_promote(self):
+        our_cache = TieredLRU_Cache(2, SegmentStore(self.directory.name))
+        our_cache.set(1, 'one')
+        our_cache.set(2, 'two')
+        our_cache.set(3, 'three')  # Spills 1
+
+        self.assertNotIn(1, our_cache.key_map)
+        self.assertIn(1, our_cache.store)
+        self.assertEqual(our_cache.get(1), 'one')  # Promoted, spilling 2
+        self.assertIn(1, our_cache.key_map)
+        self.assertNotIn(1, our_cache.store)
+        self.assertIn(2, our_cache.store)
+        self.assertEqual(our_cache.get(9), -1)
+        self.assertEqual((our_cache.memory_hits, our_cache.disk_hits, our_cache.misses), (0, 1, 1))
+        our_cache.store.close()
+
+    def test_case2_set_supersedes_disk_copy(self):
+        our_cache = TieredLRU_Cache(1, SegmentStore(self.directory.name))
+        our_cache.set('a', [1])
+        our_cache.set('b', [2])  # Spills a
+        our_cache.set('a', [3])  # Spills b, a's disk copy is stale
+        self.assertNotIn('a', our_cache.store)
+        our_cache.set('c', [4])
+        self.assertEqual(our_cache.get('a'), [3])
+        self.assertEqual(our_cache.get('b'), [2])
+        our_cache.store.close()
+
+    def test_case3_size_bound_drops_oldest_segment(self):
+        store = SegmentStore(self.directory.name, max_bytes=2048, segment_bytes=1024)
+        for key in range(100):
+            self.assertTrue(store.put(key, b'x' * 100))
+        names = os.listdir(self.directory.name)
+        print(names, len(store), store.dropped)
+        self.assertEqual(len(names), 2)
+        self.assertEqual(len(store) + store.dropped, 100)
+        self.assertIn(99, store)
+        self.assertNotIn(0, store)
+        self.assertEqual(store.get(99), b'x' * 100)
+        self.assertFalse(store.put('big', b'x' * 2000))  # Larger than a segment
+        store.close()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_case4_matches_unbounded_dict(self):
+        our_cache = TieredLRU_Cache(8, SegmentStore(self.directory.name, segment_bytes=4096))
+        expected = dict()
+        for step in range(2000):
+            key = (step * 31) % 50
+            if step % 3:
+                self.assertEqual(our_cache.get(key, None), expected.get(key))
+            else:
+                our_cache.set(key, (key, step))
+                expected[key] = (key, step)
+        self.assertEqual(our_cache.num_elements + len(our_cache.store), len(expected))
+        our_cache.store.close()
+
+
+class TestSlotLRU(unittest.TestCase):
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+
+    def test_case1(self):
+        our_cache = SlotLRU_Cache(5)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2)
+        our_cache.set(3, 3)
+        our_cache.set(4, 4)
+
+        self.assertEqual(our_cache.get(1), 1)
+        self.assertEqual(our_cache.get(2), 2)
+        self.assertEqual(our_cache.get(9), -1)  # 9 is not present in the cache
+
+        our_cache.set(5, 5)
+        our_cache.set(6, 6)
+
+        self.assertEqual(our_cache.get(3), -1)  # 3 was the least recently used entry
+        print(our_cache)  # (4: 4) -> (1: 1) -> (2: 2) -> (5: 5) -> (6: 6)
+
+    def test_case2_zero_capacity_cache(self):
+        our_cache = SlotLRU_Cache(0)
+        our_cache.set(1, 1)
+        self.assertEqual(our_cache.get(1), -1)  # nothing got cached
+
+    def test_case3_repeated_updates_to_a_key(self):
+        our_cache = SlotLRU_Cache(3)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2)
+        our_cache.set(3, 3)
+        our_cache.set(2, 4)
+        our_cache.set(2, 5)
+
+        self.assertEqual(our_cache.get(2), 5)  # k2 got updated
+        self.assertEqual(our_cache.get(1), 1)  # updates dint kick oldest node out
+
+        our_cache.set(4, 16)
+        self.assertEqual(our_cache.get(3), -1)  # k3 was the least recently used
+
+        our_cache.set(5, 25)
+        self.assertEqual(our_cache.get(2), -1)  # k2 gets kicked out
+        self.assertEqual(our_cache.get(5), 25)
+
+    def test_case4_capacity_one(self):
+        our_cache = SlotLRU_Cache(1)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2)
+        self.assertEqual(our_cache.get(1), -1)
+        self.assertEqual(our_cache.get(2), 2)
+        print(our_cache)  # (2: 2)
+
+
+class TestShardedLRU(unittest.TestCase):
+    def setUp(self):
+        print("\n\n****{}****".format(self._testMethodName))
+
+    def test_case1_single_shard_is_plain_lru(self):
+        our_cache = ShardedLRU_Cache(3, num_shards=1)
+        our_cache.set(1, 1)
+        our_cache.set(2, 2)
+        our_cache.set(3, 3)
+        our_cache.get(1)
+        our_cache.set(4, 4)
+
+        self.assertEqual(our_cache.get(2), -1)  # 2 was the least recently used
+        self.assertEqual(our_cache.get(1), 1)
+        print(our_cache.stats())  # {'hits': 2, 'misses': 1, 'evictions': 1, 'entries': 3}
+        self.assertEqual(our_cache.stats(), {'hits': 2, 'misses': 1, 'evictions': 1, 'entries': 3})
+
+    def test_case2_capacity_split_across_shards(self):
+        our_cache = ShardedLRU_Cache(10, num_shards=4)
+        self.assertEqual([shard.capacity for shard in our_cache.shards], [3, 3, 2, 2])
+        # Fewer entries than shards
+        self.assertEqual(len(ShardedLRU_Cache(2, num_shards=4).shards), 2)
+        self.assertEqual(ShardedLRU_Cache(0).get(1), -1)
+
+    def test_case3_concurrent_access(self):
+        our_cache = ShardedLRU_Cache(1000, num_shards=8)
+
+        def worker(offset):
+            for key in range(offset, offset + 2000):
+                our_cache.set(key % 1500, key)
+                our_cache.get((key * 7) % 1500)
+
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(0, 8000, 1000)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = our_cache.stats()
+        print(stats)
+        self.assertEqual(stats['hits'] + stats['misses'], 8 * 2000)
+        self.assertEqual(stats['entries'], 1000)
+        for shard in our_cache.shards:
+            # Linked order and key_map still agree in every shard
+            self.assertEqual(len(shard.key_map), shard.num_elements)
+            self.assertEqual(str(shard).count(" -> ") + 1, shard.num_elements)
+
+
+if __name__ == '__main__':
+    unittest.main()